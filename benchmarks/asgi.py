@@ -0,0 +1,103 @@
+"""Minimal in-process ASGI client: drives an app without sockets or httpx."""
+import asyncio
+from time import perf_counter_ns
+from urllib.parse import urlsplit
+
+
+async def call(app, method: str, url: str, body: bytes = b"", headers: list[tuple[bytes, bytes]] = ()) -> tuple[int, dict, bytes]:
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-length", str(len(body)).encode()), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status, response_headers, chunks = 0, {}, []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = {k.decode(): v.decode() for k, v in message.get("headers", ())}
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
+
+
+async def throughput(app, method: str, url: str, seconds: float = 1.0, body: bytes = b"", headers=()) -> tuple[float, list[int]]:
+    """Issue sequential requests for ``seconds``; return req/s and per-request latencies in ns."""
+    loop = asyncio.get_running_loop()
+    clock = loop.time
+    latencies = []
+    deadline = clock() + seconds
+    started = clock()
+    while clock() < deadline:
+        begin = perf_counter_ns()
+        status, _, _ = await call(app, method, url, body, headers)
+        latencies.append(perf_counter_ns() - begin)
+        if status >= 500:
+            raise RuntimeError(f"{method} {url} returned {status}")
+    return len(latencies) / (clock() - started), latencies
+
+
+class WebSocketSession:
+    """In-process WebSocket client; every frame the app sends is passed to ``on_message``."""
+
+    def __init__(self, app, path: str, on_message):
+        self.app = app
+        self.path = path
+        self.on_message = on_message
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.closed: int | None = None
+        self.task: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "scheme": "ws",
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+            "subprotocols": [],
+        }
+        self.incoming.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(self.app(scope, self.incoming.get, self._send))
+        await self.accepted.wait()
+
+    async def _send(self, message) -> None:
+        kind = message["type"]
+        if kind == "websocket.accept":
+            self.accepted.set()
+        elif kind == "websocket.send":
+            self.on_message(message.get("bytes") or message.get("text"))
+        elif kind == "websocket.close":
+            self.closed = message.get("code", 1000)
+            self.accepted.set()
+
+    async def disconnect(self) -> None:
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.task
@@ -0,0 +1,41 @@
+"""Throughput of cached vs uncached reads, including ETag revalidation.
+
+    python -m benchmarks.bench_cache
+"""
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+
+import main
+from benchmarks.asgi import call, throughput
+from benchmarks.synthetic import populate
+from cache import ResponseCache, ResponseCacheMiddleware
+
+
+async def run(seconds: float) -> None:
+    uncached = FastAPI()
+    uncached.include_router(main.reads)
+    cache = ResponseCache()
+    cached = ResponseCacheMiddleware(uncached, cache, prefixes=("/hello/", "/airports/"))
+
+    code = next(iter(main.store.airports))
+    for url in (f"/airports/{code}", "/hello/User"):
+        _, headers, _ = await call(cached, "GET", url)
+        revalidate = [(b"if-none-match", headers["etag"].encode())]
+        plain, _ = await throughput(uncached, "GET", url, seconds)
+        hit, _ = await throughput(cached, "GET", url, seconds)
+        not_modified, _ = await throughput(cached, "GET", url, seconds, headers=revalidate)
+        print(
+            f"{url:20} uncached {plain:8.0f}/s  cached {hit:8.0f}/s ({hit / plain:.1f}x)"
+            f"  304 {not_modified:8.0f}/s ({not_modified / plain:.1f}x)"
+        )
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0)
+    options = parser.parse_args()
+    populate(main.store, 1000, airports=50)
+    asyncio.run(run(options.seconds))
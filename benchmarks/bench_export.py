@@ -0,0 +1,56 @@
+"""Peak memory and throughput of the streaming export endpoints.
+
+Exits non-zero if traced peak memory while streaming exceeds ``--limit-mb``,
+which must hold regardless of ``--flights``. Throughput is reported with
+tracemalloc enabled, so it understates the real rate::
+
+    python -m benchmarks.bench_export --flights 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+import main
+from benchmarks.synthetic import START, populate
+
+
+async def drain(response) -> int:
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+
+def run(flights: int, limit_mb: float) -> int:
+    populate(main.store, flights)
+    for flight_id in range(flights):
+        main.store.add_booking(flight_id, f"Passenger {flight_id}", f"{flight_id % 40 + 1}A", START)
+
+    failed = 0
+    for path, endpoint in (("/flights/export", main.export_flights), ("/bookings/export", main.export_bookings)):
+        for fmt, gzip in (("ndjson", False), ("csv", False), ("ndjson", True)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = asyncio.run(endpoint(format=fmt, gzip=gzip))
+            size = asyncio.run(drain(response))
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak_mb = peak / 2**20
+            ok = peak_mb <= limit_mb
+            failed += not ok
+            print(
+                f"{path}?format={fmt}&gzip={str(gzip).lower():5} {size / 2**20:8.1f} MiB "
+                f"{flights / elapsed:10.0f} rows/s peak={peak_mb:.2f} MiB {'ok' if ok else 'OVER LIMIT'}"
+            )
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flights", type=int, default=200_000)
+    parser.add_argument("--limit-mb", type=float, default=8.0)
+    options = parser.parse_args()
+    sys.exit(1 if run(options.flights, options.limit_mb) else 0)
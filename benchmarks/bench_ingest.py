@@ -0,0 +1,178 @@
+"""Schedule import throughput, peak RSS and event loop responsiveness.
+
+Writes a synthetic timetable CSV (1% duplicate and 0.1% invalid rows),
+streams it to ``POST /schedules/import`` in 1 MiB pieces and polls the job
+until it finishes. Meanwhile a probe issues ``GET /hello/probe`` every 10ms;
+its worst latency shows how long the import held the event loop.
+``--shuffle`` writes the rows in random order instead of by departure, so
+every range overlaps the ones already loaded.
+
+    python -m benchmarks.bench_ingest --rows 10000000
+    python -m benchmarks.bench_ingest --rows 400000 --shuffle
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Iterator
+
+import main
+from benchmarks.asgi import call
+from benchmarks.synthetic import DAY, START, airport_codes
+
+PIECE = 2**20
+
+
+def schedule_lines(rows: int, airports: int, rng: random.Random) -> Iterator[str]:
+    codes = airport_codes(airports)
+    airlines = [f"{letter}{digit}" for letter in "ABCDEFGHIJ" for digit in range(10)]
+    step = 30 * DAY / rows
+    stamps: dict[int, str] = {}
+
+    def iso(timestamp: int) -> str:
+        minute = timestamp - timestamp % 60
+        text = stamps.get(minute)
+        if text is None:
+            text = stamps[minute] = datetime.fromtimestamp(minute, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return text
+
+    previous = ""
+    for index in range(rows):
+        draw = rng.random()
+        if draw < 0.01 and previous:
+            line = previous
+        elif draw < 0.011:
+            line = f"{rng.choice(airlines)},{index},ZZZ,{codes[0]},not-a-time,{iso(START)}\n"
+        else:
+            origin, destination = rng.sample(codes, 2)
+            departs_at = START + int(index * step)
+            arrives_at = departs_at + rng.randint(45, 960) * 60
+            line = f"{rng.choice(airlines)},{rng.randint(1, 9999)},{origin},{destination},{iso(departs_at)},{iso(arrives_at)}\n"
+        yield line
+        previous = line
+
+
+def write_schedule(path: str, rows: int, airports: int, seed: int = 1, shuffle: bool = False) -> None:
+    rng = random.Random(seed)
+    lines = schedule_lines(rows, airports, rng)
+    if shuffle:
+        lines = list(lines)
+        rng.shuffle(lines)
+    with open(path, "w", buffering=PIECE) as file:
+        file.write("airline,number,origin,destination,departs_at,arrives_at\n")
+        file.writelines(lines)
+
+
+async def upload(app, path: str) -> tuple[int, dict]:
+    size = os.path.getsize(path)
+    status, chunks = 0, []
+    with open(path, "rb") as file:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/schedules/import",
+            "raw_path": b"/schedules/import",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench"), (b"content-type", b"text/csv"), (b"content-length", str(size).encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+
+        async def receive():
+            piece = file.read(PIECE)
+            return {"type": "http.request", "body": piece, "more_body": len(piece) == PIECE}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            else:
+                chunks.append(message.get("body", b""))
+
+        await app(scope, receive, send)
+    return status, json.loads(b"".join(chunks))
+
+
+async def probe(app, latencies: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = perf_counter()
+        await call(app, "GET", "/hello/probe")
+        latencies.append(perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+def peak_rss_mib(who: int) -> float:
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+async def run(path: str, options) -> bool:
+    app = main.app
+    main.importer.workers = options.workers
+    latencies: list[float] = []
+    stop = asyncio.Event()
+    async with app.router.lifespan_context(app):
+        prober = asyncio.create_task(probe(app, latencies, stop))
+        started = perf_counter()
+        status, job = await upload(app, path)
+        uploaded = perf_counter() - started
+        if status != 202:
+            print(f"upload failed: {status} {job}")
+            return False
+        phases: dict[str, float] = {}
+        while job["state"] not in ("done", "failed"):
+            phases.setdefault(job["state"], perf_counter() - started)
+            await asyncio.sleep(0.2)
+            _, _, body = await call(app, "GET", f"/schedules/import/{job['id']}")
+            job = json.loads(body)
+        total = perf_counter() - started
+        stop.set()
+        await prober
+
+    latencies.sort()
+    size = os.path.getsize(path)
+    print(f"file          {size / 2**20:.0f} MiB, {options.rows} rows{' shuffled' if options.shuffle else ''}, {options.workers} workers")
+    print(f"upload        {uploaded:.1f}s ({size / 2**20 / uploaded:.0f} MiB/s)")
+    print("phases        " + ", ".join(f"{state} at {at:.1f}s" for state, at in phases.items()))
+    print(f"total         {total:.1f}s, {job['rows'] / total:,.0f} rows/s")
+    print(f"rows          {job['imported']} imported, {job['duplicates']} duplicates, {job['invalid']} invalid")
+    print(f"peak RSS      {peak_rss_mib(resource.RUSAGE_SELF):.0f} MiB app, {peak_rss_mib(resource.RUSAGE_CHILDREN):.0f} MiB largest worker")
+    print(f"probe         {len(latencies)} requests, p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, max {latencies[-1] * 1000:.1f}ms")
+    if job["state"] != "done":
+        print(f"import failed: {job['error']}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--airports", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--shuffle", action="store_true", help="write rows in random order")
+    parser.add_argument("--file", help="reuse this CSV instead of writing a temporary one")
+    options = parser.parse_args()
+    for code in airport_codes(options.airports):
+        main.store.add_airport(main.Airport(code, f"{code} International", f"{code} City", "ZZ"))
+    path = options.file
+    if path is None:
+        descriptor, path = tempfile.mkstemp(prefix="bench-schedule-", suffix=".csv")
+        os.close(descriptor)
+        started = perf_counter()
+        write_schedule(path, options.rows, options.airports, shuffle=options.shuffle)
+        print(f"wrote {path} in {perf_counter() - started:.1f}s")
+    try:
+        ok = asyncio.run(run(path, options))
+    finally:
+        if options.file is None:
+            os.unlink(path)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,165 @@
+"""Itinerary search correctness and throughput on a synthetic network.
+
+Before timing anything, searches on small random networks (half the flights
+in the CSR arrays, half in the overlay) are compared against an exhaustive
+search; any difference exits non-zero.
+
+    python -m benchmarks.bench_itinerary --per-day 50000 --days 3
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from benchmarks.synthetic import DAY, START, airport_codes, populate
+from itinerary import INF, MAX_LAYOVER, ItineraryPlanner
+from store import Airport, FlightStore
+
+
+def exhaustive(store: FlightStore, origin: str, destination: str, window: tuple[int, int], max_stops: int, min_layover: int) -> list[int]:
+    """Arrival times of the itineraries ``search`` should find, by trying every flight sequence."""
+    earliest = [INF] * (max_stops + 1)
+
+    def extend(airport: str, ready: int, limit: int, leg: int) -> None:
+        for flight in store.flights:
+            if flight.origin == airport and ready <= flight.departs_at < limit:
+                if flight.destination == destination:
+                    earliest[leg] = min(earliest[leg], flight.arrives_at)
+                elif leg < max_stops:
+                    ready_next = flight.arrives_at + min_layover
+                    extend(flight.destination, ready_next, ready_next + MAX_LAYOVER, leg + 1)
+
+    extend(origin, window[0], window[1], 0)
+    improving, best = [], INF
+    for arrival in earliest:
+        if arrival < best:
+            improving.append(best := arrival)
+    return improving
+
+
+def check(store: FlightStore, planner: ItineraryPlanner, args: tuple) -> str | None:
+    origin, destination, window, max_stops, min_layover = args
+    found = asyncio.run(planner.search(*args))
+    for legs in found:
+        flights = [store.flights[i] for i in legs]
+        if flights[0].origin != origin or flights[-1].destination != destination or not window[0] <= flights[0].departs_at < window[1]:
+            return f"{args}: bad endpoints in {legs}"
+        for before, after in zip(flights, flights[1:]):
+            layover = after.departs_at - before.arrives_at
+            if before.destination != after.origin or not min_layover <= layover < min_layover + MAX_LAYOVER:
+                return f"{args}: bad connection in {legs}"
+    arrivals = [store.flights[legs[-1]].arrives_at for legs in found]
+    expected = exhaustive(store, *args)
+    if arrivals != expected:
+        return f"{args}: arrivals {arrivals}, expected {expected}"
+    return None
+
+
+def verify(trials: int) -> list[str]:
+    failures = []
+    # A later arrival at the hub is the only one within MAX_LAYOVER of the onward flight.
+    store = FlightStore()
+    for code in ("JFK", "LHR", "SIN"):
+        store.add_airport(Airport(code, code, code, "ZZ"))
+    store.add_flight("AA", 1, "JFK", "LHR", START + 3600, START + 8 * 3600)
+    store.add_flight("AA", 2, "JFK", "LHR", START + 22 * 3600, START + 29 * 3600)
+    store.add_flight("BA", 3, "LHR", "SIN", START + 34 * 3600, START + 47 * 3600)
+    failures.append(check(store, ItineraryPlanner(store, workers=0), ("JFK", "SIN", (START, START + DAY), 1, 2700)))
+
+    rng = random.Random(5)
+    for _ in range(trials):
+        store = FlightStore()
+        codes = airport_codes(rng.randint(4, 8))
+        # The last airport only appears after the planner is built.
+        for code in codes[:-1]:
+            store.add_airport(Airport(code, code, code, "ZZ"))
+        flights = rng.randint(5, 60)
+        for index in range(flights):
+            origin, destination = rng.sample(codes if index > flights // 2 else codes[:-1], 2)
+            departs_at = START + rng.randrange(3 * DAY)
+            flight = store.add_flight("ZZ", index + 1, origin, destination, departs_at, departs_at + rng.randint(1, 20) * 3600)
+            if index == flights // 2:
+                planner = ItineraryPlanner(store, workers=0, compact_at=10**9)
+                store.add_airport(Airport(codes[-1], codes[-1], codes[-1], "ZZ"))
+            elif index > flights // 2:
+                planner.add_flight(flight)
+        origin, destination = rng.sample(codes, 2)
+        window = (START + rng.randrange(DAY), START + DAY + rng.randrange(DAY))
+        failures.append(check(store, planner, (origin, destination, window, rng.randint(0, 3), rng.choice((0, 2700, 6 * 3600)))))
+    return [failure for failure in failures if failure]
+
+
+def queries(count: int, airports: int, days: int) -> list[tuple]:
+    rng = random.Random(11)
+    codes = airport_codes(airports)
+    result = []
+    for _ in range(count):
+        day_start = START + rng.randrange(days - 1) * DAY
+        result.append((*rng.sample(codes, 2), (day_start, day_start + DAY), 2, 45 * 60))
+    return result
+
+
+async def measure(planner: ItineraryPlanner, batch: list[tuple], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(args):
+        async with semaphore:
+            return await planner.search(*args)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(args) for args in batch))
+    elapsed = time.perf_counter() - started
+    assert any(results)
+    return len(batch) / elapsed
+
+
+def run(per_day: int, days: int, airports: int, count: int, workers: int) -> None:
+    started = time.perf_counter()
+    store = populate(FlightStore(), per_day * days, airports, days)
+    loaded = time.perf_counter()
+    planner = ItineraryPlanner(store, workers=0)
+    built = time.perf_counter()
+    print(f"{len(store.flights)} flights, {airports} airports: load {loaded - started:.1f}s, graph build {built - loaded:.2f}s")
+
+    batch = queries(count, airports, days)
+    print(f"inline          {asyncio.run(measure(planner, batch, 1)):8.1f} queries/s")
+    planner.workers = workers
+    asyncio.run(measure(planner, batch[:workers], workers))  # start and warm the pool
+    print(f"{workers} worker pool   {asyncio.run(measure(planner, batch, workers * 2)):8.1f} queries/s")
+    planner.shutdown()
+
+    pending = planner.compact_at - 1
+    for flight in store.flights[:pending]:
+        planner.add_flight(store.add_flight(
+            flight.airline, flight.number, flight.origin, flight.destination, flight.departs_at + DAY, flight.arrives_at + DAY
+        ))
+    started = time.perf_counter()
+    planner.compact()
+    elapsed = time.perf_counter() - started
+    print(f"compacting {pending} new flights into {len(planner.graph)} edges: {elapsed * 1000:.0f}ms")
+
+    store.add_airport(Airport("NEW", "New", "New", "ZZ"))
+    flight = store.flights[0]
+    started = time.perf_counter()
+    planner.add_flight(store.add_flight("ZZ", 1, flight.origin, "NEW", flight.departs_at, flight.arrives_at))
+    elapsed = time.perf_counter() - started
+    print(f"first flight to a new airport: {elapsed * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-day", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--airports", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--trials", type=int, default=300, help="random networks checked against exhaustive search")
+    options = parser.parse_args()
+    failures = verify(options.trials)
+    for failure in failures:
+        print("FAIL", failure)
+    print(f"exhaustive check: {options.trials + 1 - len(failures)}/{options.trials + 1} searches match")
+    if failures:
+        sys.exit(1)
+    run(options.per_day, options.days, options.airports, options.queries, options.workers)
@@ -0,0 +1,138 @@
+"""Backend calls and throughput of coalesced lookups under concurrent load.
+
+    python -m benchmarks.bench_loader
+
+Exits non-zero if the loader fetches more batches than expected.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+from fastapi import FastAPI
+
+import main
+from benchmarks.asgi import call
+from benchmarks.synthetic import populate
+from loader import DataLoader
+
+
+class CountingBackend:
+    """Store lookup that records each batch and simulates a round-trip of ``latency`` seconds.
+
+    At most ``pool`` fetches run at once, like a database connection pool.
+    """
+
+    def __init__(self, latency: float = 0.0, pool: int = 10):
+        self.latency = latency
+        self.calls: list[list] = []
+        self._pool = asyncio.Semaphore(pool)
+
+    async def fetch(self, keys: list) -> dict:
+        self.calls.append(keys)
+        if self.latency:
+            async with self._pool:
+                await asyncio.sleep(self.latency)
+        return main.store.get_airports(keys)
+
+
+def check(name: str, actual, expected) -> bool:
+    ok = actual == expected
+    print(f"{'ok  ' if ok else 'FAIL'} {name}: {actual!r}" + ("" if ok else f" (expected {expected!r})"))
+    return ok
+
+
+async def correctness(codes: list[str]) -> bool:
+    ok = True
+
+    backend = CountingBackend()
+    loader = DataLoader(backend.fetch)
+    results = await asyncio.gather(*(loader.load(codes[0]) for _ in range(100)))
+    ok &= check("identical loads in one tick -> backend calls", len(backend.calls), 1)
+    ok &= check("identical loads -> keys fetched", backend.calls[0], [codes[0]])
+    ok &= check("identical loads -> all resolved", all(r is results[0] is not None for r in results), True)
+
+    backend = CountingBackend()
+    loader = DataLoader(backend.fetch)
+    await asyncio.gather(loader.load_many(codes[:6]), loader.load_many(codes[3:9]), loader.load(codes[4]))
+    ok &= check("overlapping loads -> backend calls", len(backend.calls), 1)
+    ok &= check("overlapping loads -> keys fetched", sorted(backend.calls[0]), sorted(codes[:9]))
+
+    backend = CountingBackend(latency=0.01)
+    loader = DataLoader(backend.fetch)
+    first = asyncio.ensure_future(loader.load(codes[0]))
+    await asyncio.sleep(0.001)
+    second = await loader.load_many([codes[0], codes[1]])
+    ok &= check("load during in-flight fetch -> backend calls", [sorted(c) for c in backend.calls], [[codes[0]], [codes[1]]])
+    ok &= check("load during in-flight fetch -> same object", (await first) is second[0], True)
+
+    backend = CountingBackend()
+    loader = DataLoader(backend.fetch, max_batch=4)
+    await loader.load_many(codes[:10])
+    ok &= check("max_batch=4, 10 keys -> batch sizes", [len(c) for c in backend.calls], [4, 4, 2])
+
+    backend = CountingBackend()
+    loader = DataLoader(backend.fetch)
+    ok &= check("missing key -> None", await loader.load("???"), None)
+
+    main.airport_loader.batches = 0
+    app = FastAPI()
+    app.include_router(main.reads)
+    responses = await asyncio.gather(*(call(app, "GET", f"/airports/{codes[i % 5]}") for i in range(200)))
+    ok &= check("200 concurrent GET /airports/{code} -> statuses", {status for status, _, _ in responses}, {200})
+    ok &= check("200 concurrent GET /airports/{code} -> fewer batches than requests", main.airport_loader.batches < 200, True)
+    print(f"     app loader after 200 concurrent requests: {main.airport_loader.stats()}")
+
+    status, _, body = await call(
+        app, "POST", "/airports:batchGet",
+        json.dumps({"codes": [*codes[:3], "???"]}).encode(), [(b"content-type", b"application/json")],
+    )
+    payload = json.loads(body)
+    ok &= check("batchGet -> found", [a["code"] for a in payload["airports"]], codes[:3])
+    ok &= check("batchGet -> missing", payload["missing"], ["???"])
+    return ok
+
+
+async def throughput(codes: list[str], concurrency: int, rounds: int, latency: float, pool: int) -> None:
+    # Every request wants one of a handful of hot keys, as on a page render.
+    keys = [codes[i % 8] for i in range(concurrency)]
+
+    backend = CountingBackend(latency, pool)
+    started = perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(backend.fetch([key]) for key in keys))
+    direct = perf_counter() - started
+    direct_calls = len(backend.calls)
+
+    backend = CountingBackend(latency, pool)
+    loader = DataLoader(backend.fetch)
+    started = perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(loader.load(key) for key in keys))
+    coalesced = perf_counter() - started
+
+    lookups = concurrency * rounds
+    print(
+        f"concurrency {concurrency:5}  direct {lookups / direct:9.0f} lookups/s ({direct_calls} backend calls)"
+        f"  coalesced {lookups / coalesced:9.0f} lookups/s ({len(backend.calls)} backend calls)"
+    )
+
+
+async def run(options) -> bool:
+    codes = list(main.store.airports)
+    ok = await correctness(codes)
+    print()
+    for concurrency in (10, 100, 1000):
+        await throughput(codes, concurrency, options.rounds, options.latency, options.pool)
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0005, help="simulated backend round-trip, seconds")
+    parser.add_argument("--pool", type=int, default=10, help="simulated backend connection pool size")
+    options = parser.parse_args()
+    populate(main.store, 1000, airports=50)
+    sys.exit(0 if asyncio.run(run(options)) else 1)
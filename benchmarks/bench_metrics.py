@@ -0,0 +1,82 @@
+"""Overhead of MetricsMiddleware on the read endpoints.
+
+Alternates single requests with and without the middleware, with the
+garbage collector paused, and compares median latencies. Alternating per
+request exposes both apps to the same machine noise and the median of
+thousands of samples ignores scheduler hiccups, so repeated runs agree to
+within a microsecond or so. The middleware costs a fixed few microseconds
+per request, so the percentage is largest for trivial handlers. The gate is
+the mean of the per-endpoint percentages, so each endpoint counts equally
+however slow its handler; above ``--max-overhead`` percent the script exits
+non-zero.
+
+    python -m benchmarks.bench_metrics
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import sys
+from time import perf_counter_ns
+
+from fastapi import FastAPI
+
+import main
+from benchmarks.asgi import call
+from benchmarks.synthetic import populate
+from metrics import Metrics, MetricsMiddleware
+
+
+async def medians(bare, instrumented, url: str, requests: int) -> tuple[float, float]:
+    """Median latency in seconds of ``bare`` and ``instrumented``, alternating which goes first."""
+    bare_times: list[int] = []
+    instrumented_times: list[int] = []
+    order = ((bare, bare_times), (instrumented, instrumented_times))
+    for request in range(requests):
+        for app, times in order if request % 2 else order[::-1]:
+            started = perf_counter_ns()
+            await call(app, "GET", url)
+            times.append(perf_counter_ns() - started)
+    return statistics.median(bare_times) / 1e9, statistics.median(instrumented_times) / 1e9
+
+
+async def run(requests: int, max_overhead: float) -> int:
+    bare = FastAPI()
+    bare.include_router(main.reads)
+    instrumented = MetricsMiddleware(bare, Metrics())
+
+    store = main.store
+    origin, destination, date = max(store._by_route, key=lambda key: len(store._by_route[key]))
+    urls = (
+        "/hello/User",
+        f"/airports/{origin}",
+        "/flights/42",
+        f"/flights?from={origin}&to={destination}&date={date}",
+        f"/airlines/{store.flights[0].airline}/flights?limit=20",
+    )
+    overheads = []
+    gc.disable()
+    try:
+        for url in urls:
+            gc.collect()
+            base, measured = await medians(bare, instrumented, url, requests)
+            overheads.append((measured / base - 1) * 100)
+            print(
+                f"{url:55} bare {base * 1e6:8.2f}us  instrumented {measured * 1e6:8.2f}us"
+                f"  +{(measured - base) * 1e6:5.2f}us ({overheads[-1]:5.2f}%)"
+            )
+    finally:
+        gc.enable()
+    overhead = statistics.fmean(overheads)
+    ok = overhead < max_overhead
+    print(f"mean overhead per endpoint {overhead:.2f}% (limit {max_overhead}%) {'ok' if ok else 'TOO SLOW'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000, help="per app and endpoint")
+    parser.add_argument("--max-overhead", type=float, default=5.0)
+    options = parser.parse_args()
+    populate(main.store, 20_000, airports=20)
+    sys.exit(asyncio.run(run(options.requests, options.max_overhead)))
@@ -0,0 +1,52 @@
+"""Requests per second of the read endpoints under each response route class.
+
+    python -m benchmarks.bench_serialization --flights 20000
+"""
+import argparse
+import asyncio
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+
+import main
+from benchmarks.asgi import throughput
+from benchmarks.synthetic import populate
+from serialization import FastJSONRoute, ValidatedJSONRoute
+
+ROUTE_CLASSES = {"default": APIRoute, "validated": ValidatedJSONRoute, "fast": FastJSONRoute}
+
+
+def build(route_class: type[APIRoute]) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(route_class=route_class)
+    for route in main.reads.routes:
+        router.add_api_route(route.path, route.endpoint, response_model=route.response_model, methods=list(route.methods))
+    app.include_router(router)
+    return app
+
+
+async def run(seconds: float) -> None:
+    store = main.store
+    busiest = max(store._by_route.items(), key=lambda item: len(item[1]))[0]
+    origin, destination, date = busiest
+    urls = [
+        "/hello/User",
+        f"/airports/{origin}",
+        "/flights/42",
+        f"/flights?from={origin}&to={destination}&date={date}",
+        f"/airlines/{store.flights[0].airline}/flights?limit=100",
+    ]
+    apps = {name: build(route_class) for name, route_class in ROUTE_CLASSES.items()}
+    print(f"{'endpoint':60}" + "".join(f"{name:>12}" for name in apps) + f"{'speedup':>10}")
+    for url in urls:
+        rates = [(await throughput(app, "GET", url, seconds))[0] for app in apps.values()]
+        print(f"{url:60}" + "".join(f"{rate:>10.0f}/s" for rate in rates) + f"{rates[-1] / rates[0]:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flights", type=int, default=20_000)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    options = parser.parse_args()
+    populate(main.store, options.flights, airports=20)
+    asyncio.run(run(options.seconds))
@@ -0,0 +1,63 @@
+"""Lookup latency of the in-memory store and the HTTP handlers backed by it.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_store --flights 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import main
+from benchmarks.synthetic import DAY, START, airport_codes, populate
+from store import day_of
+
+
+def percentiles(samples: list[int]) -> str:
+    samples.sort()
+    p50 = samples[len(samples) // 2] / 1000
+    p99 = samples[int(len(samples) * 0.99)] / 1000
+    return f"p50={p50:.2f}us p99={p99:.2f}us"
+
+
+def measure(call, args: list[tuple]) -> list[int]:
+    samples = []
+    clock = time.perf_counter_ns
+    for arg in args:
+        started = clock()
+        call(*arg)
+        samples.append(clock() - started)
+    return samples
+
+
+def run(flights: int, airports: int, queries: int) -> None:
+    started = time.perf_counter()
+    store = populate(main.store, flights, airports)
+    print(f"loaded {len(store.flights)} flights / {len(store.airports)} airports in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    codes = airport_codes(airports)
+    airport_args = [(rng.choice(codes),) for _ in range(queries)]
+    route_args = [
+        (*rng.sample(codes, 2), day_of(START + rng.randrange(30) * DAY)) for _ in range(queries)
+    ]
+    flight_args = [(rng.randrange(flights),) for _ in range(queries)]
+
+    print("store.get_airport     ", percentiles(measure(store.get_airport, airport_args)))
+    print("store.find_flights    ", percentiles(measure(store.find_flights, route_args)))
+    print("store.get_flight      ", percentiles(measure(store.get_flight, flight_args)))
+
+    loop = asyncio.new_event_loop()
+    print("handler get_airport   ", percentiles(measure(lambda c: loop.run_until_complete(main.get_airport(c)), airport_args)))
+    print("handler get_flight    ", percentiles(measure(lambda i: loop.run_until_complete(main.get_flight(i)), flight_args)))
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flights", type=int, default=1_000_000)
+    parser.add_argument("--airports", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100_000)
+    options = parser.parse_args()
+    run(options.flights, options.airports, options.queries)
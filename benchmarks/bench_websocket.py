@@ -0,0 +1,101 @@
+"""Delivery latency of flight status pushes to many connected WebSockets.
+
+Connects ``--clients`` in-process sockets to /ws/flights/{id}, publishes
+status updates through PATCH /flights/{id}/status and times each frame
+from publish to the socket's send. ``--nodes`` then repeats the fan-out
+across several broadcasters joined by a LocalHub.
+
+    python -m benchmarks.bench_websocket --clients 10000
+"""
+import argparse
+import asyncio
+import time
+
+import main
+from benchmarks.asgi import WebSocketSession, call
+from benchmarks.synthetic import populate
+from broadcast import Broadcaster, LocalHub
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples.sort()
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    print(f"{label:28} n={len(samples):7} p50={pick(0.5):7.2f}ms p99={pick(0.99):7.2f}ms max={samples[-1] * 1000:7.2f}ms")
+
+
+async def sockets(clients: int, flights: int, updates: int) -> None:
+    latencies: list[float] = []
+    published = [0.0] * flights
+    expected = [0]
+    done = asyncio.Event()
+
+    def receiver(flight_id: int):
+        def on_message(_frame) -> None:
+            latencies.append(time.perf_counter() - published[flight_id])
+            expected[0] -= 1
+            if not expected[0]:
+                done.set()
+        return on_message
+
+    sessions = [WebSocketSession(main.app, f"/ws/flights/{i % flights}", receiver(i % flights)) for i in range(clients)]
+    started = time.perf_counter()
+    expected[0] = clients  # the initial snapshot frame
+    for session in sessions:
+        await session.connect()
+    await done.wait()
+    print(f"connected {clients} sockets in {time.perf_counter() - started:.2f}s")
+    latencies.clear()
+
+    for update in range(updates):
+        done.clear()
+        expected[0] = clients
+        for flight_id in range(flights):
+            published[flight_id] = time.perf_counter()
+            body = f'{{"gate": "G{update}", "delay_minutes": {update}}}'.encode()
+            await call(main.app, "PATCH", f"/flights/{flight_id}/status", body, [(b"content-type", b"application/json")])
+        await done.wait()
+    report(f"websocket fan-out x{updates}", latencies)
+    print(main.broadcaster.stats())
+    for session in sessions:
+        await session.disconnect()
+
+
+async def cluster(clients: int, nodes: int, updates: int) -> None:
+    hub = LocalHub()
+    broadcasters = [Broadcaster(hub.backend()) for _ in range(nodes)]
+    latencies: list[float] = []
+    published = [0.0]
+
+    async def consume(subscription) -> None:
+        for _ in range(updates):
+            await subscription.get()
+            latencies.append(time.perf_counter() - published[0])
+
+    consumers = [
+        asyncio.create_task(consume(broadcasters[i % nodes].subscribe("flight:0"))) for i in range(clients)
+    ]
+    await asyncio.sleep(0)
+    for update in range(updates):
+        published[0] = time.perf_counter()
+        await broadcasters[update % nodes].publish("flight:0", b'{"flight_id":0}')
+        while len(latencies) < clients * (update + 1):
+            await asyncio.sleep(0)
+    await asyncio.gather(*consumers)
+    report(f"{nodes}-node hub fan-out x{updates}", latencies)
+
+
+async def run(clients: int, flights: int, updates: int, nodes: int) -> None:
+    await sockets(clients, flights, updates)
+    await cluster(clients, nodes, updates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--flights", type=int, default=10, help="flights the clients are spread over")
+    parser.add_argument("--updates", type=int, default=10)
+    parser.add_argument("--nodes", type=int, default=3)
+    options = parser.parse_args()
+    main.planner.workers = 0
+    populate(main.store, max(options.flights, 100), airports=20)
+    asyncio.run(run(options.clients, options.flights, options.updates, options.nodes))
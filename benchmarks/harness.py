@@ -0,0 +1,334 @@
+"""Benchmark every HTTP endpoint of ``main:app`` in-process and gate on a stored baseline.
+
+Each endpoint is driven through the full middleware stack for ``--seconds``
+with sequential requests, reporting req/s, p50/p95/p99 latency and the peak
+bytes allocated while serving one request (tracemalloc, measured in a
+separate pass so tracing does not slow the timed run). Cold start is the
+time to ``import main`` in a fresh interpreter. With ``--workers N`` every
+worker is its own process with its own app and store, as under a
+multi-worker server, and runs each endpoint at the same time as the others;
+req/s is then the sum across workers.
+
+Every scenario repeats one URL, so with the response cache on, GET reads
+would measure cache hits. The cache is therefore off unless ``--cache`` is
+given; compare cached runs only against a cached baseline.
+
+    python -m benchmarks.harness --save benchmarks/baseline.json
+    python -m benchmarks.harness --compare benchmarks/baseline.json
+    python -m benchmarks.harness --workers 4 -k airports
+    python -m benchmarks.harness --cache -k airports
+
+Each endpoint is measured ``--repeats`` times, each time in fresh
+processes, and every metric keeps its best value. ``--compare`` exits
+non-zero if a metric is worse than the baseline by more than its tolerance:
+``--tolerance`` for req/s, p50 and cold start (1.0 means twice as slow),
+``--tail-tolerance`` for p95/p99 and ``--alloc-tolerance`` for allocated
+bytes. On the shared single-CPU machine that recorded the committed
+``baseline.json``, best-of-3 timings of the unchanged tree still moved by
+up to 86% between runs, while allocations moved by under 7%, hence the
+defaults: the timing gate catches gross slowdowns, the allocation gate
+small ones. On a quiet dedicated machine, re-record the baseline with
+``--save`` and tighten the timing tolerances. The WebSocket route is
+covered by ``bench_websocket`` and schedule uploads by ``bench_ingest``.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+from benchmarks.asgi import call, throughput
+
+ROOT = Path(__file__).resolve().parent.parent
+JSON = [(b"content-type", b"application/json")]
+
+# Metric -> (higher is better, tolerance option).
+CHECKS = {
+    "rps": (True, "tolerance"),
+    "p50_us": (False, "tolerance"),
+    "p95_us": (False, "tail_tolerance"),
+    "p99_us": (False, "tail_tolerance"),
+    "alloc_bytes": (False, "alloc_tolerance"),
+}
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    url: str
+    body: bytes = b""
+    status: int = 200
+
+
+def scenarios(main) -> list[Scenario]:
+    """One request per endpoint against the synthetic data set; reads first, then writes."""
+    store = main.store
+    from store import day_of
+
+    codes = list(store.airports)
+    flight = store.flights[0]
+    day = day_of(flight.departs_at)
+    route = f"from={flight.origin}&to={flight.destination}&date={day}"
+    flight_json = json.dumps({
+        "airline": flight.airline, "number": flight.number, "origin": flight.origin,
+        "destination": flight.destination, "departs_at": flight.departs_at, "arrives_at": flight.arrives_at,
+    }).encode()
+    return [
+        Scenario("GET /", "GET", "/"),
+        Scenario("GET /hello/{name}", "GET", "/hello/User"),
+        Scenario("GET /airports/{code}", "GET", f"/airports/{codes[0]}"),
+        Scenario("POST /airports:batchGet", "POST", "/airports:batchGet", json.dumps({"codes": codes[:50]}).encode()),
+        Scenario("GET /flights", "GET", f"/flights?{route}"),
+        Scenario("GET /flights/{flight_id}", "GET", f"/flights/{flight.id}"),
+        Scenario("POST /flights:batchGet", "POST", "/flights:batchGet", json.dumps({"ids": list(range(100))}).encode()),
+        Scenario("GET /airlines/{airline}/flights", "GET", f"/airlines/{flight.airline}/flights?limit=100"),
+        Scenario("GET /itineraries", "GET", f"/itineraries?{route}&max_stops=2"),
+        Scenario("GET /flights/export", "GET", "/flights/export?format=ndjson"),
+        Scenario("GET /bookings/export", "GET", "/bookings/export?format=csv"),
+        Scenario("GET /schedules/import/{job_id}", "GET", f"/schedules/import/{next(iter(main.importer.jobs))}"),
+        Scenario("GET /cache/stats", "GET", "/cache/stats"),
+        Scenario("GET /metrics", "GET", "/metrics"),
+        Scenario("GET /debug/profile", "GET", "/debug/profile", status=200 if main.profiler else 404),
+        Scenario(
+            "POST /airports", "POST", "/airports",
+            json.dumps({"code": codes[0], "name": f"{codes[0]} International", "city": "Bench", "country": "ZZ"}).encode(),
+            201,
+        ),
+        Scenario("POST /flights", "POST", "/flights", flight_json, 201),
+        Scenario("PATCH /flights/{flight_id}/status", "PATCH", f"/flights/{flight.id}/status", b'{"gate": "A1"}'),
+        Scenario("POST /bookings", "POST", "/bookings", json.dumps({"flight_id": flight.id, "passenger": "Bench", "seat": "1A"}).encode(), 201),
+    ]
+
+
+async def sample_import(main) -> None:
+    """Import a few rows so there is a job to poll."""
+    flight = main.store.flights[0]
+
+    async def body():
+        yield b"airline,number,origin,destination,departs_at,arrives_at\n"
+        departs_at, arrives_at = (datetime.fromtimestamp(t, timezone.utc).isoformat() for t in (flight.departs_at, flight.arrives_at))
+        yield f"ZZ,1,{flight.origin},{flight.destination},{departs_at},{arrives_at}\n".encode()
+
+    await main.importer.receive(body())
+    await main.importer.wait()
+
+
+def uncovered(main, names: set[str]) -> list[str]:
+    from fastapi.routing import APIRoute
+
+    routes = {
+        f"{method} {route.path}"
+        for route in main.app.routes
+        if isinstance(route, APIRoute) and route.include_in_schema
+        for method in route.methods
+    }
+    return sorted(routes - names - {"POST /schedules/import"})
+
+
+def percentile(ordered: list[int], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000
+
+
+async def allocations(app, scenario: Scenario, requests: int) -> float:
+    headers = JSON if scenario.body else ()
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await call(app, scenario.method, scenario.url, scenario.body, headers)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / requests
+
+
+async def measure(options, barrier=None, verbose: bool = True) -> dict:
+    """Run every selected scenario against a freshly populated ``main.app``."""
+    import main
+    from benchmarks.synthetic import populate
+
+    populate(main.store, options.flights, airports=options.airports)
+    await main.planner.rebuild()
+    if not options.cache:
+        main.response_cache.storage.max_bytes = 0
+    await sample_import(main)
+    selected = [s for s in scenarios(main) if not options.k or options.k in s.name]
+    results = {"uncovered": uncovered(main, {s.name for s in scenarios(main)}), "endpoints": {}}
+    app = main.app
+    async with app.router.lifespan_context(app):
+        for scenario in selected:
+            headers = JSON if scenario.body else ()
+            status, _, body = await call(app, scenario.method, scenario.url, scenario.body, headers)
+            if status != scenario.status:
+                raise RuntimeError(f"{scenario.name}: expected {scenario.status}, got {status}: {body[:200]!r}")
+            await throughput(app, scenario.method, scenario.url, options.warmup, scenario.body, headers)
+            if barrier is not None:
+                barrier.wait()
+            rate, latencies = await throughput(app, scenario.method, scenario.url, options.seconds, scenario.body, headers)
+            # Tracing is slow, so slow endpoints trace no more requests than they timed.
+            traced = min(options.alloc_requests, len(latencies))
+            results["endpoints"][scenario.name] = {
+                "rps": rate,
+                "latencies": latencies,
+                "alloc_bytes": await allocations(app, scenario, traced),
+            }
+            if verbose:
+                print(f"  {scenario.name}", file=sys.stderr)
+    return results
+
+
+def _worker(options, barrier, results, verbose) -> None:
+    results.put(asyncio.run(measure(options, barrier, verbose)))
+
+
+def run_workers(options, fresh: bool = False) -> list[dict]:
+    """Results of each worker; ``fresh`` runs even a single worker in a new process."""
+    if options.workers == 1 and not fresh:
+        return [asyncio.run(measure(options))]
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(options.workers)
+    queue = context.Queue()
+    workers = [context.Process(target=_worker, args=(options, barrier, queue, i == 0)) for i in range(options.workers)]
+    for worker in workers:
+        worker.start()
+    runs = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return runs
+
+
+def summarize(runs: list[dict]) -> dict:
+    endpoints = {}
+    for name in runs[0]["endpoints"]:
+        samples = [run["endpoints"][name] for run in runs]
+        ordered = sorted(latency for sample in samples for latency in sample["latencies"])
+        endpoints[name] = {
+            "rps": sum(sample["rps"] for sample in samples),
+            "p50_us": percentile(ordered, 0.50),
+            "p95_us": percentile(ordered, 0.95),
+            "p99_us": percentile(ordered, 0.99),
+            "alloc_bytes": statistics.fmean(sample["alloc_bytes"] for sample in samples),
+        }
+    return endpoints
+
+
+def best(summaries: list[dict]) -> dict:
+    """Each metric's best value across repeats."""
+    endpoints = {}
+    for name in summaries[0]:
+        rows = [summary[name] for summary in summaries]
+        endpoints[name] = {
+            metric: (max if higher else min)(row[metric] for row in rows) for metric, (higher, _) in CHECKS.items()
+        }
+    return endpoints
+
+
+def cold_start(runs: int) -> dict:
+    """Fastest time to import ``main``, and to run a whole interpreter that does only that."""
+    script = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+    imports, processes = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+        processes.append(time.perf_counter() - started)
+        imports.append(float(output.stdout.strip().splitlines()[-1]))
+    return {"import_s": min(imports), "process_s": min(processes)}
+
+
+def report(results: dict) -> None:
+    cold = results["cold_start"]
+    print(f"cold start: import main {cold['import_s'] * 1000:.0f}ms, interpreter + import {cold['process_s'] * 1000:.0f}ms")
+    print(f"workers: {results['meta']['workers']}")
+    print(f"{'endpoint':36} {'req/s':>9} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'alloc KiB':>10}")
+    for name, row in results["endpoints"].items():
+        print(
+            f"{name:36} {row['rps']:9.0f} {row['p50_us']:9.1f} {row['p95_us']:9.1f}"
+            f" {row['p99_us']:9.1f} {row['alloc_bytes'] / 1024:10.1f}"
+        )
+
+
+def compare(results: dict, baseline: dict, options) -> list[str]:
+    regressions = []
+    for key in ("workers", "cache", "cpus", "python"):
+        if baseline["meta"].get(key) != results["meta"][key]:
+            print(f"warning: baseline has {key}={baseline['meta'].get(key)}, this run {key}={results['meta'][key]}")
+    rows = [("cold start", "import_s", results["cold_start"]["import_s"], baseline["cold_start"]["import_s"], False, options.tolerance)]
+    for name, row in results["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            continue
+        for metric, (higher, tolerance) in CHECKS.items():
+            rows.append((name, metric, row[metric], before[metric], higher, getattr(options, tolerance)))
+    for name, metric, value, before, higher, tolerance in rows:
+        # How much slower or bigger, so 0.5 means 1.5x the time or 1/1.5 the rate.
+        worse = (before / value if higher else value / before) - 1 if before and value else 0.0
+        if worse > tolerance:
+            regressions.append(f"{name} {metric}: {before:.4g} -> {value:.4g} ({(value - before) / before:+.1%})")
+    return regressions
+
+
+def main_() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0, help="timed run per endpoint")
+    parser.add_argument("--warmup", type=float, default=0.2)
+    parser.add_argument("--alloc-requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3, help="runs per endpoint; each metric keeps its best")
+    parser.add_argument("--flights", type=int, default=10_000)
+    parser.add_argument("--airports", type=int, default=200)
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on; reads then measure hits")
+    parser.add_argument("-k", help="only endpoints whose name contains this string")
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="fail on regressions against this baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="for req/s, p50 and cold start")
+    parser.add_argument("--tail-tolerance", type=float, default=1.5, help="for p95 and p99")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.15)
+    options = parser.parse_args()
+
+    os.chdir(ROOT)
+    # The write scenarios grow the store, so every repeat needs fresh processes.
+    repeats = [run_workers(options, fresh=options.repeats > 1) for _ in range(options.repeats)]
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "workers": options.workers,
+            "flights": options.flights,
+            "seconds": options.seconds,
+            "repeats": options.repeats,
+            "cache": options.cache,
+        },
+        "cold_start": cold_start(options.cold_runs),
+        "endpoints": best([summarize(runs) for runs in repeats]),
+    }
+    report(results)
+    if repeats[0][0]["uncovered"]:
+        print("not covered:", ", ".join(repeats[0][0]["uncovered"]))
+    if options.save:
+        options.save.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"saved {options.save}")
+    if options.compare:
+        regressions = compare(results, json.loads(options.compare.read_text()), options)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+        print(f"no regressions against {options.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_())
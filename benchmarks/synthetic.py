@@ -0,0 +1,35 @@
+import random
+from itertools import product
+from string import ascii_uppercase
+
+from store import Airport, FlightStore
+
+START = 1_714_521_600  # 2024-05-01T00:00:00Z
+DAY = 86_400
+
+
+def airport_codes(count: int) -> list[str]:
+    codes = ("".join(letters) for letters in product(ascii_uppercase, repeat=3))
+    return [code for code, _ in zip(codes, range(count))]
+
+
+def populate(store: FlightStore, flights: int, airports: int = 500, days: int = 30, seed: int = 1) -> FlightStore:
+    """Fill ``store`` with a reproducible random network, in departure order."""
+    rng = random.Random(seed)
+    codes = airport_codes(airports)
+    for code in codes:
+        store.add_airport(Airport(code, f"{code} International", f"{code} City", "ZZ"))
+    airlines = [f"{a}{b}" for a, b in product(ascii_uppercase[:10], repeat=2)]
+    step = days * DAY / flights
+    for index in range(flights):
+        origin, destination = rng.sample(codes, 2)
+        departs_at = START + int(index * step)
+        store.add_flight(
+            rng.choice(airlines),
+            rng.randint(1, 9999),
+            origin,
+            destination,
+            departs_at,
+            departs_at + rng.randint(45, 960) * 60,
+        )
+    return store
@@ -0,0 +1,148 @@
+import asyncio
+from collections import deque
+from typing import Callable, Protocol
+
+Deliver = Callable[[str, bytes], None]
+
+
+class SubscriptionClosed(Exception):
+    pass
+
+
+class SlowConsumer(SubscriptionClosed):
+    pass
+
+
+class Subscription:
+    """Bounded per-client mailbox. Overflowing it drops the client."""
+
+    __slots__ = ("channel", "limit", "closed", "dropped", "_queue", "_ready")
+
+    def __init__(self, channel: str, limit: int):
+        self.channel = channel
+        self.limit = limit
+        self.closed = False
+        self.dropped = False
+        self._queue: deque[bytes] = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, message: bytes) -> bool:
+        if len(self._queue) >= self.limit:
+            return False
+        self._queue.append(message)
+        self._ready.set()
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        self._ready.set()
+
+    def drop(self) -> None:
+        self.dropped = True
+        self.close()
+
+    async def get(self) -> bytes:
+        while not self._queue:
+            if self.closed:
+                raise SlowConsumer(self.channel) if self.dropped else SubscriptionClosed(self.channel)
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+
+class BroadcastBackend(Protocol):
+    """Transport between broadcasters. ``bind`` registers this node's delivery callback."""
+
+    def bind(self, deliver: Deliver) -> None: ...
+
+    async def publish(self, channel: str, message: bytes) -> None: ...
+
+
+class MemoryBackend:
+    """Single-process backend: a publish is delivered straight to the local node."""
+
+    def __init__(self):
+        self._deliver: Deliver | None = None
+
+    def bind(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        self._deliver(channel, message)
+
+
+class LocalHub:
+    """Stand-in for a shared message bus, used to simulate several app nodes in one process."""
+
+    def __init__(self):
+        self.nodes: list[Deliver] = []
+
+    def backend(self) -> "HubBackend":
+        return HubBackend(self)
+
+
+class HubBackend:
+    def __init__(self, hub: LocalHub):
+        self.hub = hub
+
+    def bind(self, deliver: Deliver) -> None:
+        self.hub.nodes.append(deliver)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for deliver in self.hub.nodes:
+            deliver(channel, message)
+
+
+class Broadcaster:
+    """In-process pub/sub that fans each message out once to every subscriber of a channel.
+
+    Messages are bytes serialized by the publisher, so the same object is
+    queued for every client. A client whose mailbox is full when a message
+    arrives is dropped rather than slowing down delivery to the others.
+    """
+
+    def __init__(self, backend: BroadcastBackend | None = None, queue_size: int = 32):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.queue_size = queue_size
+        self.channels: dict[str, set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.backend.bind(self._deliver)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, self.queue_size)
+        self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self.channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.channels[subscription.channel]
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        self.published += 1
+        await self.backend.publish(channel, message)
+
+    def _deliver(self, channel: str, message: bytes) -> None:
+        subscribers = self.channels.get(channel)
+        if not subscribers:
+            return
+        slow = [subscription for subscription in subscribers if not subscription.push(message)]
+        self.delivered += len(subscribers) - len(slow)
+        for subscription in slow:
+            subscription.drop()
+            self.unsubscribe(subscription)
+        self.dropped += len(slow)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "channels": len(self.channels),
+            "subscribers": sum(map(len, self.channels.values())),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,194 @@
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Callable, Iterable, Protocol
+
+
+class CachedResponse:
+    __slots__ = ("status", "headers", "body", "etag", "size")
+
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes, etag: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers)
+
+
+class CacheStorage(Protocol):
+    evictions: int
+
+    def get(self, key: str) -> CachedResponse | None: ...
+
+    def set(self, key: str, value: CachedResponse) -> None: ...
+
+    def invalidate(self, prefix: str = "") -> int: ...
+
+    def __len__(self) -> int: ...
+
+
+class LRUStorage:
+    """In-process LRU storage bounded by total bytes, with a per-entry TTL."""
+
+    def __init__(self, max_bytes: int = 64 * 2**20, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedResponse | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires <= self.clock():
+            self._remove(key)
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        if value.size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self.bytes += value.size
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, prefix: str = "") -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.bytes -= value.size
+
+
+class ResponseCache:
+    """GET response cache keyed on path + query string.
+
+    Write endpoints call :meth:`invalidate` with the path prefix they affect;
+    a bumped generation also stops responses computed before the write from
+    being stored after it.
+    """
+
+    def __init__(self, storage: CacheStorage | None = None):
+        self.storage = storage if storage is not None else LRUStorage()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def invalidate(self, *prefixes: str) -> None:
+        self.generation += 1
+        for prefix in prefixes or ("",):
+            self.invalidations += self.storage.invalidate(prefix)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.storage.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self.storage),
+            "bytes": getattr(self.storage, "bytes", 0),
+        }
+
+
+def make_etag(body: bytes) -> bytes:
+    return b'"' + blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+
+def _etag_matches(header: bytes, etag: bytes) -> bool:
+    return header.strip() == b"*" or etag in (tag.strip() for tag in header.split(b","))
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving cached GET responses with strong ETags.
+
+    A request whose ``If-None-Match`` matches the cached ETag gets a bodiless
+    ``304`` without running the handler. Only complete ``200`` responses are
+    stored; streamed responses pass through untouched.
+    """
+
+    def __init__(self, app, cache: ResponseCache, prefixes: Iterable[str] = ("/",)):
+        self.app = app
+        self.cache = cache
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        cache = self.cache
+        key = scope["path"]
+        if scope["query_string"]:
+            key += "?" + scope["query_string"].decode("latin-1")
+        if_none_match = next((v for k, v in scope["headers"] if k == b"if-none-match"), None)
+
+        entry = cache.storage.get(key)
+        if entry is not None:
+            cache.hits += 1
+            await self._send_entry(entry, if_none_match, send)
+            return
+
+        cache.misses += 1
+        generation = cache.generation
+        start: dict | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def buffer(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False) or start["status"] != 200:
+                    # Streamed or non-cacheable: flush what we held and step aside.
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": message.get("more_body", False)})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, buffer)
+        if passthrough or start is None:
+            return
+
+        body = b"".join(chunks)
+        headers = [(k, v) for k, v in start.get("headers", ()) if k not in (b"etag", b"content-length")]
+        entry = CachedResponse(start["status"], headers, body, make_etag(body))
+        if generation == cache.generation:
+            cache.storage.set(key, entry)
+        await self._send_entry(entry, if_none_match, send)
+
+    async def _send_entry(self, entry: CachedResponse, if_none_match: bytes | None, send) -> None:
+        if if_none_match is not None and _etag_matches(if_none_match, entry.etag):
+            self.cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", entry.etag)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = [*entry.headers, (b"etag", entry.etag), (b"content-length", str(len(entry.body)).encode())]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Sequence
+
+from store import Booking, Flight
+
+CHUNK_ROWS = 1000
+
+
+def _iso(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+FLIGHT_COLUMNS = ("id", "airline", "number", "origin", "destination", "departs_at", "arrives_at", "status", "gate", "delay_minutes")
+BOOKING_COLUMNS = ("id", "flight_id", "passenger", "seat", "booked_at")
+
+
+def flight_row(flight: Flight) -> tuple:
+    return (
+        flight.id, flight.airline, flight.number, flight.origin, flight.destination,
+        _iso(flight.departs_at), _iso(flight.arrives_at), flight.status, flight.gate, flight.delay,
+    )
+
+
+def booking_row(booking: Booking) -> tuple:
+    return booking.id, booking.flight_id, booking.passenger, booking.seat, _iso(booking.booked_at)
+
+
+def snapshot(records: Sequence) -> Iterator:
+    # Stop at the length seen when the export started, so rows appended
+    # while streaming don't extend the response indefinitely.
+    return islice(records, len(records))
+
+
+def ndjson_chunks(records: Iterable, columns: Sequence[str], row: Callable[..., tuple]) -> Iterator[bytes]:
+    dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    records = iter(records)
+    while batch := list(islice(records, CHUNK_ROWS)):
+        yield "".join(dumps(dict(zip(columns, row(record)))) + "\n" for record in batch).encode()
+
+
+def csv_chunks(records: Iterable, columns: Sequence[str], row: Callable[..., tuple]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    records = iter(records)
+    while batch := list(islice(records, CHUNK_ROWS)):
+        writer.writerows(map(row, batch))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+FORMATS = {
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+    "csv": (csv_chunks, "text/csv"),
+}
+
+
+def export_stream(
+    records: Sequence, columns: Sequence[str], row: Callable[..., tuple], fmt: str, gzip: bool
+) -> tuple[Iterator[bytes], str]:
+    """Return a chunk generator over ``records`` and the media type to serve it as."""
+    encode, media_type = FORMATS[fmt]
+    chunks = encode(snapshot(records), columns, row)
+    if gzip:
+        return gzip_chunks(chunks), "application/gzip"
+    return chunks, media_type
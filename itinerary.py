@@ -0,0 +1,284 @@
+import asyncio
+import os
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable
+
+from store import Flight, FlightStore
+
+INF = 2**62
+DAY = 86_400
+MAX_LAYOVER = DAY
+
+
+class RouteGraph:
+    """Time-dependent flight graph in CSR form.
+
+    Edges leaving airport ``i`` occupy ``offsets[i]:offsets[i + 1]`` of the
+    parallel ``departs``/``arrives``/``targets``/``flight_ids`` arrays,
+    sorted by departure time so a search can bisect to the first usable
+    connection. Airports are numbered in ``codes`` order.
+    """
+
+    def __init__(self, codes: list[str], offsets: array, departs: array, arrives: array, targets: array, flight_ids: array):
+        self.codes = codes
+        self.index = {code: i for i, code in enumerate(codes)}
+        self.offsets = offsets
+        self.departs = departs
+        self.arrives = arrives
+        self.targets = targets
+        self.flight_ids = flight_ids
+
+    def __getstate__(self):
+        return self.codes, self.offsets, self.departs, self.arrives, self.targets, self.flight_ids
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self) -> int:
+        return len(self.departs)
+
+    @classmethod
+    def build(cls, codes: Iterable[str], flights: Iterable[Flight]) -> "RouteGraph":
+        codes = list(codes)
+        index = {code: i for i, code in enumerate(codes)}
+        buckets: list[list[tuple[int, int, int, int]]] = [[] for _ in codes]
+        for flight in flights:
+            buckets[index[flight.origin]].append(
+                (flight.departs_at, flight.arrives_at, index[flight.destination], flight.id)
+            )
+        return cls._from_buckets(codes, buckets)
+
+    @classmethod
+    def _from_buckets(cls, codes: list[str], buckets: list[list[tuple[int, int, int, int]]]) -> "RouteGraph":
+        offsets = array("q", [0])
+        departs, arrives, targets, flight_ids = array("q"), array("q"), array("q"), array("q")
+        for edges in buckets:
+            edges.sort()
+            for departs_at, arrives_at, target, flight_id in edges:
+                departs.append(departs_at)
+                arrives.append(arrives_at)
+                targets.append(target)
+                flight_ids.append(flight_id)
+            offsets.append(len(departs))
+        return cls(codes, offsets, departs, arrives, targets, flight_ids)
+
+    def merged(self, codes: list[str], overlay: dict[int, list[tuple[int, int, int, int]]]) -> "RouteGraph":
+        """Return a new graph with ``overlay`` edges folded into the CSR arrays.
+
+        Untouched airports are copied slice-wise, so compaction costs a
+        memcpy of the arrays rather than a rebuild from flight records.
+        """
+        offsets = array("q", [0])
+        columns = (array("q"), array("q"), array("q"), array("q"))
+        sources = (self.departs, self.arrives, self.targets, self.flight_ids)
+        known = len(self.offsets) - 1
+        for i in range(len(codes)):
+            start, end = (self.offsets[i], self.offsets[i + 1]) if i < known else (0, 0)
+            extra = overlay.get(i)
+            if not extra:
+                for column, source in zip(columns, sources):
+                    column.extend(source[start:end])
+            else:
+                edges = sorted([*zip(*(source[start:end] for source in sources)), *extra])
+                for column, values in zip(columns, zip(*edges)):
+                    column.extend(values)
+            offsets.append(len(columns[0]))
+        return RouteGraph(codes, offsets, *columns)
+
+    def search(
+        self,
+        origin: int,
+        destination: int,
+        window: tuple[int, int],
+        max_stops: int,
+        min_layover: int,
+        overlay: dict[int, list[tuple[int, int, int, int]]] | None = None,
+    ) -> list[list[int]]:
+        """Earliest-arrival itineraries, one per number of legs that improves on fewer legs.
+
+        A connection must leave between ``min_layover`` and ``min_layover +
+        MAX_LAYOVER`` after the previous arrival, so an earlier arrival at a
+        hub does not make a later one redundant: the later one may still make
+        a departure the earlier one has to let go. Round ``k`` therefore keeps
+        every arrival reached with ``k`` legs, merges their connection windows
+        per airport and scans each departure in the merged windows once. Only
+        departures before the best known arrival at ``destination`` are
+        scanned. The first leg must depart within ``window``. Returns lists of
+        flight ids.
+        """
+        overlay = overlay or {}
+        offsets, departs, arrives, targets, flight_ids = (
+            self.offsets, self.departs, self.arrives, self.targets, self.flight_ids
+        )
+        best = INF
+        # Per round: (airport, arrival) -> (flight id, previous airport, its departure).
+        parents: list[dict[tuple[int, int], tuple[int, int, int]]] = []
+        # Per round: airport -> sorted arrival times the round started from.
+        rounds: list[dict[int, list[int]]] = []
+        reached = {origin: [window[0]]}
+        found = []
+        for leg in range(max_stops + 1):
+            parent: dict[tuple[int, int], tuple[int, int, int]] = {}
+            rounds.append(reached)
+            for airport, arrivals in reached.items():
+                arrivals.sort()
+                if leg:
+                    intervals = _windows(arrivals, min_layover, best)
+                else:
+                    intervals = [(window[0], min(window[1], best))]
+                start, end = offsets[airport], offsets[airport + 1]
+                extra = overlay.get(airport, ())
+                for ready, limit in intervals:
+                    position = bisect_left(departs, ready, start, end)
+                    while position < end and departs[position] < limit:
+                        arrives_at = arrives[position]
+                        if arrives_at < best:
+                            key = (targets[position], arrives_at)
+                            if key not in parent:
+                                parent[key] = (flight_ids[position], airport, departs[position])
+                        position += 1
+                    for departs_at, arrives_at, target, flight_id in extra[bisect_left(extra, (ready,)):]:
+                        if departs_at >= limit:
+                            break
+                        if arrives_at < best and (target, arrives_at) not in parent:
+                            parent[(target, arrives_at)] = (flight_id, airport, departs_at)
+            parents.append(parent)
+            reached = {}
+            arrival = INF
+            for target, arrives_at in parent:
+                if target == destination:
+                    arrival = min(arrival, arrives_at)
+                else:
+                    reached.setdefault(target, []).append(arrives_at)
+            if arrival < best:
+                best = arrival
+                found.append(self._legs(parents, rounds, destination, arrival, min_layover))
+            if not reached:
+                break
+        return found
+
+    @staticmethod
+    def _legs(
+        parents: list[dict[tuple[int, int], tuple[int, int, int]]],
+        rounds: list[dict[int, list[int]]],
+        destination: int,
+        arrival: int,
+        min_layover: int,
+    ) -> list[int]:
+        legs = []
+        key = (destination, arrival)
+        for leg in range(len(parents) - 1, -1, -1):
+            flight_id, airport, departs_at = parents[leg][key]
+            legs.append(flight_id)
+            if leg:
+                # Any arrival whose window holds the departure will do; the latest one does.
+                arrivals = rounds[leg][airport]
+                key = (airport, arrivals[bisect_right(arrivals, departs_at - min_layover) - 1])
+        legs.reverse()
+        return legs
+
+
+def _windows(arrivals: list[int], min_layover: int, best: int) -> list[tuple[int, int]]:
+    """Merge the connection windows of sorted ``arrivals``, cut off at ``best``."""
+    intervals: list[tuple[int, int]] = []
+    for arrival in arrivals:
+        ready = arrival + min_layover
+        limit = min(ready + MAX_LAYOVER, best)
+        if ready >= limit:
+            continue
+        if intervals and ready <= intervals[-1][1]:
+            intervals[-1] = (intervals[-1][0], max(intervals[-1][1], limit))
+        else:
+            intervals.append((ready, limit))
+    return intervals
+
+
+_graph: RouteGraph | None = None
+
+
+def _install(graph: RouteGraph) -> None:
+    global _graph
+    _graph = graph
+
+
+def _search(*args) -> list[list[int]]:
+    return _graph.search(*args)
+
+
+class ItineraryPlanner:
+    """Keeps a :class:`RouteGraph` in sync with a store and runs searches off the event loop.
+
+    New flights go into a small sorted per-airport overlay that searches
+    read alongside the CSR arrays; once it reaches ``compact_at`` edges, or a
+    flight mentions an airport the graph has not seen, it is merged into a
+    fresh graph and the worker pool is restarted with it. Merging copies the
+    arrays slice-wise; only :meth:`rebuild` reads every flight in the store,
+    and it does so in a thread.
+    """
+
+    def __init__(self, store: FlightStore, workers: int | None = None, compact_at: int = 1024):
+        self.store = store
+        self.workers = int(os.environ.get("AIRPORT_ITINERARY_WORKERS", min(4, os.cpu_count() or 1))) if workers is None else workers
+        self.compact_at = compact_at
+        self.graph = RouteGraph.build(store.airports, store.flights)
+        self.overlay: dict[int, list[tuple[int, int, int, int]]] = {}
+        self.pending = 0
+        self._pool: ProcessPoolExecutor | None = None
+
+    def add_flight(self, flight: Flight) -> None:
+        codes, index = self.graph.codes, self.graph.index
+        if flight.origin not in index or flight.destination not in index:
+            # New airports are numbered after the known ones, so merged()
+            # gives them empty rows and only the overlay needs to mention them.
+            codes = codes + [code for code in self.store.airports if code not in index]
+            index = {code: i for i, code in enumerate(codes)}
+            self.pending = self.compact_at
+        insort(
+            self.overlay.setdefault(index[flight.origin], []),
+            (flight.departs_at, flight.arrives_at, index[flight.destination], flight.id),
+        )
+        self.pending += 1
+        if self.pending >= self.compact_at:
+            self.compact(codes)
+
+    def compact(self, codes: list[str] | None = None) -> None:
+        """Fold the overlay into the CSR arrays, adding rows for ``codes`` past the known airports."""
+        self.graph = self.graph.merged(codes or self.graph.codes, self.overlay)
+        self.overlay = {}
+        self.pending = 0
+        self.shutdown()
+
+    async def rebuild(self) -> None:
+        """Rebuild the graph from every flight in the store without blocking the event loop.
+
+        Used after bulk loads that bypass :meth:`add_flight`. The build runs in
+        a thread; flights added meanwhile go back through :meth:`add_flight`.
+        """
+        count = len(self.store.flights)
+        codes = self.graph.codes + [code for code in self.store.airports if code not in self.graph.index]
+        graph = await asyncio.to_thread(RouteGraph.build, codes, islice(self.store.flights, count))
+        self.graph = graph
+        self.overlay = {}
+        self.pending = 0
+        self.shutdown()
+        for flight in islice(self.store.flights, count, None):
+            self.add_flight(flight)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def search(self, origin: str, destination: str, window: tuple[int, int], max_stops: int, min_layover: int) -> list[list[int]]:
+        index = self.graph.index
+        if origin not in index or destination not in index or origin == destination:
+            return []
+        args = (index[origin], index[destination], window, max_stops, min_layover, self.overlay)
+        if not self.workers:
+            return self.graph.search(*args)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_install, initargs=(self.graph,))
+        return await asyncio.get_running_loop().run_in_executor(self._pool, _search, *args)
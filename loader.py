@@ -0,0 +1,85 @@
+import asyncio
+import inspect
+from typing import Awaitable, Callable, Generic, Hashable, Iterable, Mapping, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFn = Callable[[list[K]], Mapping[K, V] | Awaitable[Mapping[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """Coalesces lookups into batched backend fetches.
+
+    Keys requested during the same event-loop tick are collected and
+    fetched with a single ``batch_fn`` call on the next tick. A key whose
+    fetch is already running is not fetched again: later callers wait on
+    the same future. Nothing is cached once a fetch completes, so there is
+    nothing to invalidate when the backend changes.
+    """
+
+    def __init__(self, batch_fn: BatchFn, max_batch: int = 1000):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.batches = 0
+        self.keys_fetched = 0
+        self.coalesced = 0
+        self._pending: dict[K, asyncio.Future] = {}
+        self._running: dict[K, asyncio.Future] = {}
+
+    async def load(self, key: K) -> V | None:
+        # Shielded so a cancelled caller does not cancel a fetch others share.
+        return await asyncio.shield(self._future(key))
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        return await asyncio.shield(asyncio.gather(*map(self._future, keys)))
+
+    def _future(self, key: K) -> asyncio.Future:
+        future = self._running.get(key) or self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        future = self._pending[key] = loop.create_future()
+        return future
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch):
+            chunk = {key: pending[key] for key in keys[start:start + self.max_batch]}
+            self._running.update(chunk)
+            self.batches += 1
+            self.keys_fetched += len(chunk)
+            try:
+                result = self.batch_fn(list(chunk))
+            except Exception as exc:
+                self._settle(chunk, exc=exc)
+                continue
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(self._finish(chunk, result))
+            else:
+                self._settle(chunk, result)
+
+    async def _finish(self, chunk: dict[K, asyncio.Future], result: Awaitable[Mapping[K, V]]) -> None:
+        try:
+            values = await result
+        except Exception as exc:
+            self._settle(chunk, exc=exc)
+        else:
+            self._settle(chunk, values)
+
+    def _settle(self, chunk: dict[K, asyncio.Future], values: Mapping[K, V] | None = None, exc: Exception | None = None) -> None:
+        for key, future in chunk.items():
+            self._running.pop(key, None)
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(values.get(key))
+
+    def stats(self) -> dict[str, int]:
+        return {"batches": self.batches, "keys_fetched": self.keys_fetched, "coalesced": self.coalesced}
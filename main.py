@@ -1,6 +1,186 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import date as Date, datetime, timezone
+from typing import Literal
 
-app = FastAPI()
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic_core import to_json
+
+from broadcast import Broadcaster, SlowConsumer, Subscription, SubscriptionClosed
+from cache import ResponseCache, ResponseCacheMiddleware
+from export import BOOKING_COLUMNS, FLIGHT_COLUMNS, booking_row, export_stream, flight_row
+from itinerary import DAY, ItineraryPlanner
+from loader import DataLoader
+from metrics import LoopLagMonitor, Metrics, MetricsMiddleware, SamplingProfiler
+from schemas import (
+    AirportBatchIn,
+    AirportBatchOut,
+    AirportIn,
+    AirportOut,
+    BookingIn,
+    BookingOut,
+    FlightBatchIn,
+    FlightBatchOut,
+    FlightIn,
+    FlightOut,
+    FlightStatusIn,
+    ImportJobOut,
+    ItineraryOut,
+)
+from schedules import ImportJob, ScheduleImporter
+from serialization import FastJSONRoute
+from store import Airport, Booking, Flight, FlightStore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_lag.start()
+    if profiler is not None:
+        profiler.watch(app.routes)
+        profiler.start()
+    yield
+    loop_lag.stop()
+    if profiler is not None:
+        profiler.stop()
+    importer.shutdown()
+    planner.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+if os.environ.get("AIRPORT_FAST_JSON") == "1":
+    app.router.route_class = FastJSONRoute
+# Hot read endpoints skip jsonable_encoder and response re-validation.
+reads = APIRouter(route_class=FastJSONRoute)
+store = FlightStore()
+planner = ItineraryPlanner(store)
+# Concurrent lookups within one event-loop tick share a single store fetch.
+airport_loader = DataLoader(store.get_airports)
+flight_loader = DataLoader(store.get_flights)
+broadcaster = Broadcaster()
+response_cache = ResponseCache()
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    prefixes=("/hello/", "/airports/", "/flights", "/airlines/", "/itineraries"),
+)
+importer = ScheduleImporter(
+    store, planner, on_change=lambda: response_cache.invalidate("/flights", "/airlines/", "/itineraries")
+)
+metrics = Metrics()
+metrics.register(
+    "response_cache_events_total", "counter", "Response cache lookups and evictions by outcome.",
+    lambda: [({"event": event}, response_cache.stats()[event]) for event in ("hits", "misses", "not_modified", "evictions", "invalidations")],
+)
+metrics.register(
+    "response_cache_bytes", "gauge", "Bytes held by the response cache.",
+    lambda: [({}, response_cache.stats()["bytes"])],
+)
+metrics.register(
+    "loader_events_total", "counter", "Batched lookups: backend batches, keys fetched and coalesced loads.",
+    lambda: [
+        ({"loader": name, "event": event}, value)
+        for name, loader in (("airports", airport_loader), ("flights", flight_loader))
+        for event, value in loader.stats().items()
+    ],
+)
+metrics.register(
+    "broadcast_messages_total", "counter", "Flight status messages published, delivered and dropped.",
+    lambda: [({"event": event}, broadcaster.stats()[event]) for event in ("published", "delivered", "dropped")],
+)
+metrics.register(
+    "broadcast_subscribers", "gauge", "Connected flight status subscribers.",
+    lambda: [({}, broadcaster.stats()["subscribers"])],
+)
+metrics.register(
+    "schedule_import_rows_total", "counter", "Rows from schedule imports by outcome.",
+    lambda: [({"outcome": outcome}, value) for outcome, value in importer.totals.items()],
+)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+loop_lag = LoopLagMonitor(metrics)
+profiler = SamplingProfiler() if os.environ.get("AIRPORT_PROFILE") == "1" else None
+
+
+def epoch(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def airport_out(airport: Airport) -> dict:
+    return {
+        "code": airport.code,
+        "name": airport.name,
+        "city": airport.city,
+        "country": airport.country,
+        "timezone": airport.timezone,
+    }
+
+
+def flight_out(flight: Flight) -> dict:
+    return {
+        "id": flight.id,
+        "airline": flight.airline,
+        "number": flight.number,
+        "origin": airport_out(store.airports[flight.origin]),
+        "destination": airport_out(store.airports[flight.destination]),
+        "departs_at": datetime.fromtimestamp(flight.departs_at, timezone.utc),
+        "arrives_at": datetime.fromtimestamp(flight.arrives_at, timezone.utc),
+        "status": flight.status,
+        "gate": flight.gate,
+        "delay_minutes": flight.delay,
+    }
+
+
+def status_message(flight: Flight) -> bytes:
+    return to_json({
+        "flight_id": flight.id,
+        "status": flight.status,
+        "gate": flight.gate,
+        "delay_minutes": flight.delay,
+    })
+
+
+def booking_out(booking: Booking) -> dict:
+    return {
+        "id": booking.id,
+        "flight_id": booking.flight_id,
+        "passenger": booking.passenger,
+        "seat": booking.seat,
+        "booked_at": datetime.fromtimestamp(booking.booked_at, timezone.utc),
+    }
+
+
+def import_job_out(job: ImportJob) -> dict:
+    elapsed = (job.finished_at or time.time()) - job.started_at
+    return {
+        "id": job.id,
+        "state": job.state,
+        "bytes_received": job.bytes_received,
+        "bytes_total": job.bytes_total,
+        "chunks": job.chunks,
+        "chunks_done": job.chunks_done,
+        "rows": job.rows,
+        "imported": job.imported,
+        "invalid": job.invalid,
+        "duplicates": job.duplicates,
+        "rows_per_second": job.rows / elapsed if elapsed > 0 else 0.0,
+        "errors": job.errors,
+        "started_at": datetime.fromtimestamp(job.started_at, timezone.utc),
+        "finished_at": datetime.fromtimestamp(job.finished_at, timezone.utc) if job.finished_at else None,
+        "error": job.error,
+    }
+
+
+def export_response(name: str, records, columns, row, fmt: str, gzip: bool) -> StreamingResponse:
+    chunks, media_type = export_stream(records, columns, row, fmt, gzip)
+    filename = f"{name}.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @app.get("/")
@@ -8,6 +188,221 @@ async def root():
     return {"message": "Hello World"}
 
 
-@app.get("/hello/{name}")
+@reads.get("/hello/{name}")
 async def say_hello(name: str):
     return {"message": f"Hello {name}"}
+
+
+@reads.get("/airports/{code}", response_model=AirportOut)
+async def get_airport(code: str):
+    airport = await airport_loader.load(code.upper())
+    if airport is None:
+        raise HTTPException(status_code=404, detail="Airport not found")
+    return airport_out(airport)
+
+
+@app.post("/airports", response_model=AirportOut, status_code=201)
+async def create_airport(payload: AirportIn):
+    airport = store.add_airport(Airport(**payload.model_dump() | {"code": payload.code.upper()}))
+    # Codes in paths are case-insensitive and cache keys are raw paths, so
+    # clear whole prefixes rather than the canonical key alone.
+    response_cache.invalidate("/airports/", "/flights", "/airlines/", "/itineraries")
+    return airport_out(airport)
+
+
+@reads.post("/airports:batchGet", response_model=AirportBatchOut)
+async def batch_get_airports(payload: AirportBatchIn):
+    codes = list(dict.fromkeys(code.upper() for code in payload.codes))
+    airports = await airport_loader.load_many(codes)
+    return {
+        "airports": [airport_out(airport) for airport in airports if airport is not None],
+        "missing": [code for code, airport in zip(codes, airports) if airport is None],
+    }
+
+
+@reads.get("/flights", response_model=list[FlightOut])
+async def find_flights(
+    origin: str = Query(alias="from", min_length=3, max_length=3),
+    destination: str = Query(alias="to", min_length=3, max_length=3),
+    date: Date = Query(description="UTC departure date, not the origin's local date"),
+):
+    flights = store.find_flights(origin.upper(), destination.upper(), date.isoformat())
+    return [flight_out(flight) for flight in flights]
+
+
+@app.get("/flights/export")
+async def export_flights(format: Literal["ndjson", "csv"] = "ndjson", gzip: bool = False):
+    return export_response("flights", store.flights, FLIGHT_COLUMNS, flight_row, format, gzip)
+
+
+@reads.get("/flights/{flight_id}", response_model=FlightOut)
+async def get_flight(flight_id: int):
+    flight = await flight_loader.load(flight_id)
+    if flight is None:
+        raise HTTPException(status_code=404, detail="Flight not found")
+    return flight_out(flight)
+
+
+@reads.post("/flights:batchGet", response_model=FlightBatchOut)
+async def batch_get_flights(payload: FlightBatchIn):
+    ids = list(dict.fromkeys(payload.ids))
+    flights = await flight_loader.load_many(ids)
+    return {
+        "flights": [flight_out(flight) for flight in flights if flight is not None],
+        "missing": [flight_id for flight_id, flight in zip(ids, flights) if flight is None],
+    }
+
+
+@app.post("/flights", response_model=FlightOut, status_code=201)
+async def create_flight(payload: FlightIn):
+    origin, destination = payload.origin.upper(), payload.destination.upper()
+    for code in (origin, destination):
+        if store.get_airport(code) is None:
+            raise HTTPException(status_code=422, detail=f"Unknown airport {code}")
+    departs_at, arrives_at = epoch(payload.departs_at), epoch(payload.arrives_at)
+    if arrives_at <= departs_at:
+        raise HTTPException(status_code=422, detail="Flight must arrive after it departs")
+    flight = store.add_flight(
+        payload.airline.upper(),
+        payload.number,
+        origin,
+        destination,
+        departs_at,
+        arrives_at,
+        payload.status,
+        payload.gate,
+    )
+    planner.add_flight(flight)
+    response_cache.invalidate("/flights", "/airlines/", "/itineraries")
+    return flight_out(flight)
+
+
+@app.patch("/flights/{flight_id}/status", response_model=FlightOut)
+async def update_flight_status(flight_id: int, payload: FlightStatusIn):
+    flight = store.get_flight(flight_id)
+    if flight is None:
+        raise HTTPException(status_code=404, detail="Flight not found")
+    if payload.status is not None:
+        flight.status = payload.status
+    if "gate" in payload.model_fields_set:
+        flight.gate = payload.gate
+    if payload.delay_minutes is not None:
+        flight.delay = payload.delay_minutes
+    response_cache.invalidate("/flights", "/airlines/", "/itineraries")
+    await broadcaster.publish(f"flight:{flight.id}", status_message(flight))
+    return flight_out(flight)
+
+
+async def _close_on_disconnect(websocket: WebSocket, subscription: Subscription) -> None:
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        subscription.close()
+
+
+@app.websocket("/ws/flights/{flight_id}")
+async def flight_status_updates(websocket: WebSocket, flight_id: int):
+    flight = store.get_flight(flight_id)
+    if flight is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    subscription = broadcaster.subscribe(f"flight:{flight_id}")
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, subscription))
+    try:
+        await websocket.send_bytes(status_message(flight))
+        while True:
+            await websocket.send_bytes(await subscription.get())
+    except SlowConsumer:
+        await websocket.close(code=1013)
+    except (SubscriptionClosed, WebSocketDisconnect):
+        pass
+    finally:
+        watcher.cancel()
+        broadcaster.unsubscribe(subscription)
+
+
+@reads.get("/airlines/{airline}/flights", response_model=list[FlightOut])
+async def airline_flights(airline: str, since: datetime | None = None, limit: int = Query(100, ge=1, le=1000)):
+    start = epoch(since) if since else 0
+    return [flight_out(flight) for flight in store.airline_flights(airline.upper(), start, limit)]
+
+
+@reads.get("/itineraries", response_model=list[ItineraryOut])
+async def find_itineraries(
+    origin: str = Query(alias="from", min_length=3, max_length=3),
+    destination: str = Query(alias="to", min_length=3, max_length=3),
+    date: Date = Query(description="UTC date the first leg departs on, not the origin's local date"),
+    max_stops: int = Query(2, ge=0, le=3),
+    min_layover: int = Query(45, ge=0, le=24 * 60, description="Minimum connection time in minutes"),
+):
+    day_start = epoch(datetime.combine(date, datetime.min.time()))
+    found = await planner.search(
+        origin.upper(), destination.upper(), (day_start, day_start + DAY), max_stops, min_layover * 60
+    )
+    itineraries = []
+    for legs in found:
+        flights = [store.flights[flight_id] for flight_id in legs]
+        itineraries.append({
+            "stops": len(flights) - 1,
+            "departs_at": datetime.fromtimestamp(flights[0].departs_at, timezone.utc),
+            "arrives_at": datetime.fromtimestamp(flights[-1].arrives_at, timezone.utc),
+            "duration_minutes": (flights[-1].arrives_at - flights[0].departs_at) // 60,
+            "legs": [flight_out(flight) for flight in flights],
+        })
+    return itineraries
+
+
+@app.post("/bookings", response_model=BookingOut, status_code=201)
+async def create_booking(payload: BookingIn):
+    if store.get_flight(payload.flight_id) is None:
+        raise HTTPException(status_code=422, detail="Unknown flight")
+    booking = store.add_booking(
+        payload.flight_id, payload.passenger, payload.seat, int(datetime.now(timezone.utc).timestamp())
+    )
+    return booking_out(booking)
+
+
+@app.get("/bookings/export")
+async def export_bookings(format: Literal["ndjson", "csv"] = "ndjson", gzip: bool = False):
+    return export_response("bookings", store.bookings, BOOKING_COLUMNS, booking_row, format, gzip)
+
+
+@app.post("/schedules/import", response_model=ImportJobOut, status_code=202)
+async def import_schedule(request: Request):
+    length = request.headers.get("content-length")
+    job = await importer.receive(request.stream(), int(length) if length and length.isdigit() else None)
+    return JSONResponse(
+        jsonable_encoder(import_job_out(job)),
+        status_code=202,
+        headers={"Location": f"/schedules/import/{job.id}"},
+    )
+
+
+@app.get("/schedules/import/{job_id}", response_model=ImportJobOut)
+async def import_status(job_id: str):
+    job = importer.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return import_job_out(job)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def profile_report(top: int = 20):
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler disabled; set AIRPORT_PROFILE=1")
+    return profiler.report(top)
+
+
+app.include_router(reads)
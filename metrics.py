@@ -0,0 +1,297 @@
+import asyncio
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Iterable
+
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RouteSeries:
+    __slots__ = ("latency", "size")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Request metrics registry rendered in the Prometheus text exposition format.
+
+    Other components contribute gauges and counters with :meth:`register`;
+    the callable is only invoked when ``/metrics`` is scraped.
+    """
+
+    def __init__(self):
+        self.series: dict[tuple[str, str, int], RouteSeries] = {}
+        self.in_flight = 0
+        self.loop_lag = Histogram(LATENCY_BUCKETS)
+        self.loop_lag_last = 0.0
+        self._collectors: list[tuple[str, str, str, Callable[[], Iterable[tuple[dict, float]]]]] = []
+
+    def register(self, name: str, kind: str, help: str, collect: Callable[[], Iterable[tuple[dict, float]]]) -> None:
+        self._collectors.append((name, kind, help, collect))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        labels = {key: _labels(method=key[0], route=key[1], status=str(key[2])) for key in self.series}
+        self._histograms(
+            lines, "http_request_duration_seconds", "Request latency by route template.",
+            ((labels[key], series.latency) for key, series in self.series.items()),
+        )
+        self._histograms(
+            lines, "http_response_size_bytes", "Response body size by route template.",
+            ((labels[key], series.size) for key, series in self.series.items()),
+        )
+        lines += ["# HELP http_requests_in_flight Requests currently being handled.", "# TYPE http_requests_in_flight gauge"]
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+        self._histograms(lines, "event_loop_lag_seconds", "Delay of event loop wake-ups past their deadline.", [("", self.loop_lag)])
+        lines += [
+            "# HELP event_loop_lag_last_seconds Most recent event loop lag sample.",
+            "# TYPE event_loop_lag_last_seconds gauge",
+            f"event_loop_lag_last_seconds {self.loop_lag_last!r}",
+        ]
+        for name, kind, help, collect in self._collectors:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, value in collect():
+                label_text = f"{{{_labels(**labels)}}}" if labels else ""
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histograms(lines: list[str], name: str, help: str, series: Iterable[tuple[str, Histogram]]) -> None:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+        for labels, histogram in series:
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {histogram.sum!r}")
+            lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and response size per route template.
+
+    The template comes from the endpoint the router matched. Requests the
+    router never saw, such as response-cache hits, are matched against the
+    router's routes once per distinct path, up to ``memo_size`` paths. The
+    series each ``(method, endpoint or path, status)`` resolves to is
+    memoised too, so a request costs one dict lookup on top of the timing.
+    """
+
+    def __init__(self, app, metrics: Metrics, memo_size: int = 4096):
+        self.app = app
+        self.metrics = metrics
+        self.memo_size = memo_size
+        self._router = None
+        self._templates: dict = {}
+        self._paths: dict[tuple[str, str], str] = {}
+        self._series: dict[tuple, RouteSeries] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        # A plain function returning send's awaitable avoids an extra
+        # coroutine frame per message.
+        def measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            else:
+                size += len(message.get("body", b""))
+            return send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, measure)
+        finally:
+            elapsed = perf_counter() - started
+            metrics.in_flight -= 1
+            series = self._series.get((scope["method"], scope.get("endpoint") or scope["path"], status))
+            if series is None:
+                series = self._resolve(scope, status)
+            # Histogram.observe inlined; this runs on every request.
+            latency, sizes = series.latency, series.size
+            latency.counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            latency.sum += elapsed
+            sizes.counts[bisect_left(SIZE_BUCKETS, size)] += 1
+            sizes.sum += size
+
+    def _resolve(self, scope, status: int) -> RouteSeries:
+        key = (scope["method"], self._template(scope), status)
+        series = self.metrics.series.get(key)
+        if series is None:
+            series = self.metrics.series[key] = RouteSeries()
+        if len(self._series) >= self.memo_size:
+            self._series.clear()
+        self._series[(scope["method"], scope.get("endpoint") or scope["path"], status)] = series
+        return series
+
+    def _template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        template = self._templates.get(endpoint)
+        if template is not None:
+            return template
+        router = scope.get("router")
+        if router is not None:
+            self._router = router
+            if endpoint is not None:
+                # A route registered after the map was built.
+                self._templates = {route.endpoint: route.path for route in router.routes if hasattr(route, "endpoint")}
+                template = self._templates.get(endpoint)
+                if template is not None:
+                    return template
+        key = (scope["method"], scope["path"])
+        template = self._paths.get(key)
+        if template is None:
+            template = self._match(scope)
+            if len(self._paths) >= self.memo_size:
+                self._paths.clear()
+            self._paths[key] = template
+        return template
+
+    def _match(self, scope) -> str:
+        if self._router is None:
+            return UNMATCHED
+        for route in self._router.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return route.path
+        return UNMATCHED
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop runs a callback scheduled ``interval`` seconds ahead."""
+
+    def __init__(self, metrics: Metrics, interval: float = 0.25):
+        self.metrics = metrics
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        clock = time.perf_counter
+        while True:
+            expected = clock() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, clock() - expected)
+            self.metrics.loop_lag.observe(lag)
+            self.metrics.loop_lag_last = lag
+
+
+class SamplingProfiler:
+    """Background thread that samples the event loop thread's stack.
+
+    Every ``interval`` seconds it records which registered handlers are on
+    the stack, and the innermost frame, so :meth:`report` can list where
+    handler CPU time goes without instrumenting each call.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.handlers: dict = {}
+        self.samples = 0
+        self.idle = 0
+        self.hits: Counter[str] = Counter()
+        self.leaves: Counter[str] = Counter()
+        self._target: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(self, routes: Iterable) -> None:
+        for route in routes:
+            endpoint = getattr(route, "endpoint", None)
+            if hasattr(endpoint, "__code__"):
+                self.handlers[endpoint.__code__] = f"{endpoint.__name__} {route.path}"
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            self.samples += 1
+            leaf = frame.f_code
+            if leaf.co_name == "select" and leaf.co_filename.endswith("selectors.py"):
+                # The loop is waiting for I/O, not running a handler.
+                self.idle += 1
+                continue
+            self.leaves[f"{leaf.co_name} ({leaf.co_filename}:{frame.f_lineno})"] += 1
+            while frame is not None:
+                handler = self.handlers.get(frame.f_code)
+                if handler is not None:
+                    self.hits[handler] += 1
+                    break
+                frame = frame.f_back
+
+    def report(self, top: int = 20) -> str:
+        total = self.samples or 1
+        lines = [
+            f"{self.samples} samples every {self.interval * 1000:g}ms, {self.idle / total:.1%} idle",
+            "",
+            "hottest handlers:",
+        ]
+        lines += [f"{count / total:7.2%} {count:8} {name}" for name, count in self.hits.most_common(top)]
+        lines += ["", "hottest frames:"]
+        lines += [f"{count / total:7.2%} {count:8} {name}" for name, count in self.leaves.most_common(top)]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,324 @@
+import asyncio
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Iterator
+
+from itinerary import ItineraryPlanner
+from store import FlightStore
+
+CHUNK_BYTES = 16 * 2**20
+WRITE_BYTES = 2**20
+INSERT_BATCH = 2000
+MAX_ERRORS = 20
+MAX_JOBS = 100
+HEADER = b"airline,"
+
+
+class ImportJob:
+    __slots__ = (
+        "id", "state", "path", "bytes_received", "bytes_total", "chunks", "chunks_done",
+        "rows", "imported", "invalid", "duplicates", "errors", "started_at", "finished_at", "error",
+    )
+
+    def __init__(self, id: str, path: str, bytes_total: int | None):
+        self.id = id
+        self.state = "receiving"
+        self.path = path
+        self.bytes_received = 0
+        self.bytes_total = bytes_total
+        self.chunks = 0
+        self.chunks_done = 0
+        self.rows = 0
+        self.imported = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.errors: list[str] = []
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+
+class Chunk:
+    """Valid rows of one byte range, in departure order, as parallel columns."""
+
+    __slots__ = ("departs", "arrives", "numbers", "airlines", "origins", "destinations", "rows", "invalid", "duplicates", "errors")
+
+    def __init__(self):
+        self.departs = array("q")
+        self.arrives = array("q")
+        self.numbers = array("q")
+        self.airlines: list[str] = []
+        self.origins: list[str] = []
+        self.destinations: list[str] = []
+        self.rows = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.errors: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.departs)
+
+
+def byte_ranges(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[tuple[int, int]]:
+    """Split ``path`` into ranges of about ``chunk_bytes`` that end on a line break."""
+    size = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while start < size:
+            end = data.find(b"\n", min(start + chunk_bytes, size) - 1)
+            end = size if end == -1 else end + 1
+            yield start, end
+            start = end
+
+
+def lines(data: mmap.mmap, start: int, end: int) -> Iterator[tuple[int, bytes]]:
+    data.seek(start)
+    readline = data.readline
+    position = start
+    while position < end:
+        line = readline()
+        yield position, line
+        position += len(line)
+
+
+def epoch(text: str) -> int:
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+_airports: frozenset[str] = frozenset()
+
+
+def _install(airports: frozenset[str]) -> None:
+    global _airports
+    _airports = airports
+
+
+def parse_range(path: str, start: int, end: int) -> Chunk:
+    """Parse, validate and dedup the CSV rows in ``path[start:end]``.
+
+    Rows are ``airline,number,origin,destination,departs_at,arrives_at`` with
+    ISO 8601 times (UTC unless they carry an offset). An optional header line
+    is skipped. Rows repeating an ``(airline, number, departs_at)`` seen
+    earlier in the range count as duplicates.
+    """
+    chunk = Chunk()
+    seen: set[tuple[str, int, int]] = set()
+    rows: list[tuple[int, int, str, int, str, str]] = []
+    names: dict[str, str] = {}
+    airports = _airports
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for offset, line in lines(data, start, end):
+            line = line.strip()
+            if not line or (offset == 0 and line.startswith(HEADER)):
+                continue
+            chunk.rows += 1
+            try:
+                fields = line.decode().split(",")
+                if len(fields) != 6:
+                    raise ValueError(f"expected 6 fields, got {len(fields)}")
+                airline, number, origin, destination, departs, arrives = fields
+                airline, origin, destination = airline.strip().upper(), origin.strip().upper(), destination.strip().upper()
+                number, departs_at, arrives_at = int(number), epoch(departs.strip()), epoch(arrives.strip())
+                if not 2 <= len(airline) <= 3:
+                    raise ValueError(f"invalid airline {airline!r}")
+                if number <= 0:
+                    raise ValueError(f"invalid flight number {number}")
+                for code in (origin, destination):
+                    if code not in airports:
+                        raise ValueError(f"unknown airport {code!r}")
+                if arrives_at <= departs_at:
+                    raise ValueError("flight must arrive after it departs")
+            except ValueError as exc:
+                chunk.invalid += 1
+                if len(chunk.errors) < MAX_ERRORS:
+                    chunk.errors.append(f"byte {offset}: {exc}")
+                continue
+            key = (airline, number, departs_at)
+            if key in seen:
+                chunk.duplicates += 1
+                continue
+            seen.add(key)
+            airline = names.setdefault(airline, airline)
+            rows.append((departs_at, arrives_at, airline, number, names.setdefault(origin, origin), names.setdefault(destination, destination)))
+    rows.sort()
+    for departs_at, arrives_at, airline, number, origin, destination in rows:
+        chunk.departs.append(departs_at)
+        chunk.arrives.append(arrives_at)
+        chunk.numbers.append(number)
+        chunk.airlines.append(airline)
+        chunk.origins.append(origin)
+        chunk.destinations.append(destination)
+    return chunk
+
+
+class ScheduleImporter:
+    """Bulk-loads timetable CSV uploads into a store as background jobs.
+
+    The upload is written to a temporary file as it arrives. The file is then
+    cut into byte ranges that a process pool parses, validates and dedups in
+    parallel; at most two ranges per worker are in flight, so memory stays
+    bounded by the chunk size rather than the file size. Ranges are inserted
+    in file order, in batches that yield to the event loop, skipping flights
+    the store already has. Each range is merged into the store indexes, and
+    invalidates cached responses, once after all of its rows are added. The
+    itinerary graph is rebuilt once at the end.
+    """
+
+    def __init__(
+        self,
+        store: FlightStore,
+        planner: ItineraryPlanner,
+        on_change: Callable[[], None] = lambda: None,
+        workers: int | None = None,
+        chunk_bytes: int = CHUNK_BYTES,
+        directory: str | None = None,
+    ):
+        self.store = store
+        self.planner = planner
+        self.on_change = on_change
+        self.workers = int(os.environ.get("AIRPORT_IMPORT_WORKERS", min(4, os.cpu_count() or 1))) if workers is None else workers
+        self.chunk_bytes = chunk_bytes
+        self.directory = directory if directory is not None else os.environ.get("AIRPORT_IMPORT_DIR")
+        self.jobs: dict[str, ImportJob] = {}
+        self.totals = {"imported": 0, "invalid": 0, "duplicates": 0}
+        self._tasks: set[asyncio.Task] = set()
+        self._loading = asyncio.Lock()
+
+    def get(self, job_id: str) -> ImportJob | None:
+        return self.jobs.get(job_id)
+
+    async def receive(self, body: AsyncIterator[bytes], bytes_total: int | None = None) -> ImportJob:
+        """Spool ``body`` to disk and start importing it in the background.
+
+        The returned job is ``queued``: the upload is on disk and the import
+        task has been scheduled but has not run yet.
+        """
+        descriptor, path = tempfile.mkstemp(prefix="schedule-", suffix=".csv", dir=self.directory)
+        job = ImportJob(uuid.uuid4().hex, path, bytes_total)
+        self._remember(job)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                pending: list[bytes] = []
+                size = 0
+                async for data in body:
+                    pending.append(data)
+                    size += len(data)
+                    job.bytes_received += len(data)
+                    if size >= WRITE_BYTES:
+                        await asyncio.to_thread(file.write, b"".join(pending))
+                        pending, size = [], 0
+                await asyncio.to_thread(file.write, b"".join(pending))
+        except BaseException as exc:
+            self._fail(job, exc)
+            os.unlink(path)
+            raise
+        job.state = "queued"
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def wait(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    async def _run(self, job: ImportJob) -> None:
+        try:
+            job.state = "parsing"
+            ranges = await asyncio.to_thread(list, byte_ranges(job.path, self.chunk_bytes))
+            job.chunks = len(ranges)
+            airports = frozenset(self.store.airports)
+            if self.workers:
+                pool = ProcessPoolExecutor(self.workers, initializer=_install, initargs=(airports,))
+            else:
+                # Parse in the default thread pool instead.
+                pool = None
+                _install(airports)
+            try:
+                await self._insert_all(job, ranges, pool, max(1, 2 * self.workers))
+            finally:
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            job.state = "indexing"
+            await self.planner.rebuild()
+            self.on_change()
+            job.state = "done"
+            job.finished_at = time.time()
+        except Exception as exc:
+            self._fail(job, exc)
+        finally:
+            os.unlink(job.path)
+
+    async def _insert_all(self, job: ImportJob, ranges: list[tuple[int, int]], pool: ProcessPoolExecutor | None, in_flight: int) -> None:
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(pool, parse_range, job.path, start, end) for start, end in ranges[:in_flight]]
+        for index in range(len(ranges)):
+            chunk = await futures[index]
+            futures[index] = None
+            if index + in_flight < len(ranges):
+                futures.append(loop.run_in_executor(pool, parse_range, job.path, *ranges[index + in_flight]))
+            job.rows += chunk.rows
+            job.invalid += chunk.invalid
+            job.duplicates += chunk.duplicates
+            self.totals["invalid"] += chunk.invalid
+            self.totals["duplicates"] += chunk.duplicates
+            job.errors += chunk.errors[:MAX_ERRORS - len(job.errors)]
+            job.state = "loading"
+            await self._insert(job, chunk)
+            job.chunks_done += 1
+
+    async def _insert(self, job: ImportJob, chunk: Chunk) -> None:
+        # Rows are checked against the store as it was before this range,
+        # which is enough since parse_range already dropped repeats within
+        # it; the lock keeps ranges of concurrent jobs from interleaving.
+        store = self.store
+        columns = (chunk.airlines, chunk.numbers, chunk.origins, chunk.destinations, chunk.departs, chunk.arrives)
+        async with self._loading:
+            try:
+                for start in range(0, len(chunk), INSERT_BATCH):
+                    imported = 0
+                    for airline, number, origin, destination, departs_at, arrives_at in zip(*(column[start:start + INSERT_BATCH] for column in columns)):
+                        if store.has_flight(airline, number, departs_at):
+                            job.duplicates += 1
+                            self.totals["duplicates"] += 1
+                            continue
+                        store.add_flight(airline, number, origin, destination, departs_at, arrives_at, deferred=True)
+                        imported += 1
+                    job.imported += imported
+                    self.totals["imported"] += imported
+                    await asyncio.sleep(0)
+            finally:
+                for _ in store.index_deferred():
+                    await asyncio.sleep(0)
+                self.on_change()
+
+    def _fail(self, job: ImportJob, exc: BaseException) -> None:
+        job.state = "failed"
+        job.error = f"{type(exc).__name__}: {exc}"
+        job.finished_at = time.time()
+
+    def _remember(self, job: ImportJob) -> None:
+        if len(self.jobs) >= MAX_JOBS:
+            oldest = next((key for key, old in self.jobs.items() if old.finished), None)
+            if oldest is not None:
+                del self.jobs[oldest]
+        self.jobs[job.id] = job
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class AirportIn(BaseModel):
+    code: str = Field(min_length=3, max_length=3)
+    name: str
+    city: str
+    country: str
+    timezone: str = "UTC"
+
+
+class AirportOut(AirportIn):
+    pass
+
+
+class FlightIn(BaseModel):
+    airline: str = Field(min_length=2, max_length=3)
+    number: int = Field(gt=0)
+    origin: str = Field(min_length=3, max_length=3)
+    destination: str = Field(min_length=3, max_length=3)
+    departs_at: datetime
+    arrives_at: datetime
+    status: str = "scheduled"
+    gate: str | None = None
+
+
+class FlightOut(BaseModel):
+    id: int
+    airline: str
+    number: int
+    origin: AirportOut
+    destination: AirportOut
+    departs_at: datetime
+    arrives_at: datetime
+    status: str
+    gate: str | None
+    delay_minutes: int = 0
+
+
+class FlightStatusIn(BaseModel):
+    status: str | None = None
+    gate: str | None = None
+    delay_minutes: int | None = Field(None, ge=0)
+
+
+class AirportBatchIn(BaseModel):
+    codes: list[str] = Field(min_length=1, max_length=1000)
+
+
+class AirportBatchOut(BaseModel):
+    airports: list[AirportOut]
+    missing: list[str]
+
+
+class FlightBatchIn(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+
+
+class FlightBatchOut(BaseModel):
+    flights: list[FlightOut]
+    missing: list[int]
+
+
+class ItineraryOut(BaseModel):
+    stops: int
+    departs_at: datetime
+    arrives_at: datetime
+    duration_minutes: int
+    legs: list[FlightOut]
+
+
+class ImportJobOut(BaseModel):
+    id: str
+    state: str
+    bytes_received: int
+    bytes_total: int | None
+    chunks: int
+    chunks_done: int
+    rows: int
+    imported: int
+    invalid: int
+    duplicates: int
+    rows_per_second: float
+    errors: list[str]
+    started_at: datetime
+    finished_at: datetime | None
+    error: str | None
+
+
+class BookingIn(BaseModel):
+    flight_id: int
+    passenger: str = Field(min_length=1)
+    seat: str | None = None
+
+
+class BookingOut(BookingIn):
+    id: int
+    booked_at: datetime
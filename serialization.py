@@ -0,0 +1,76 @@
+import asyncio
+from functools import wraps
+from typing import Any, Callable
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+class FastJSONRoute(APIRoute):
+    """Route that writes the handler's return value straight to JSON bytes.
+
+    The default route runs every result through ``jsonable_encoder`` and
+    re-validates it against ``response_model`` before encoding. Here the
+    value goes directly to pydantic-core's serializer and ``response_model``
+    is only used for the OpenAPI schema, so handlers must return data that
+    already has the documented shape. Headers and a status code set on an
+    injected ``Response`` parameter are copied onto the result, as FastAPI
+    does for its default route. Routes declared with a ``response_class``
+    other than ``JSONResponse`` are left to FastAPI.
+
+    Use it per router with ``APIRouter(route_class=FastJSONRoute)`` or
+    app-wide by assigning ``app.router.route_class`` before declaring routes.
+    """
+
+    def dump(self, content: Any) -> bytes:
+        return to_json(content)
+
+    def get_route_handler(self):
+        response_class = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        if response_class is JSONResponse:
+            self.dependant.call = self._wrap(self.dependant.call)
+        return super().get_route_handler()
+
+    def _wrap(self, call: Callable) -> Callable:
+        dump = self.dump
+        status_code = self.status_code or 200
+        response_param = self.dependant.response_param_name
+
+        def render(content: Any, injected: Response | None) -> Any:
+            if isinstance(content, Response):
+                return content
+            response = Response(dump(content), status_code=status_code, media_type="application/json")
+            if injected is not None:
+                if injected.status_code:
+                    response.status_code = injected.status_code
+                response.headers.raw.extend(injected.headers.raw)
+            return response
+
+        if asyncio.iscoroutinefunction(call):
+            @wraps(call)
+            async def endpoint(*args, **kwargs):
+                return render(await call(*args, **kwargs), kwargs.get(response_param) if response_param else None)
+        else:
+            @wraps(call)
+            def endpoint(*args, **kwargs):
+                return render(call(*args, **kwargs), kwargs.get(response_param) if response_param else None)
+        return endpoint
+
+
+class ValidatedJSONRoute(FastJSONRoute):
+    """:class:`FastJSONRoute` that still validates results against ``response_model``."""
+
+    def get_route_handler(self):
+        self._adapter = TypeAdapter(self.response_model) if self.response_model is not None else None
+        return super().get_route_handler()
+
+    def dump(self, content: Any) -> bytes:
+        if self._adapter is None:
+            return to_json(content)
+        return self._adapter.dump_json(self._adapter.validate_python(content))
@@ -0,0 +1,199 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Iterator
+
+MERGE_MIN = 128
+
+_days: dict[int, str] = {}
+
+
+def day_of(timestamp: int) -> str:
+    # Called for every inserted flight; a bulk import spans only a few hundred days.
+    day = timestamp // 86_400
+    text = _days.get(day)
+    if text is None:
+        text = _days[day] = datetime.fromtimestamp(day * 86_400, timezone.utc).date().isoformat()
+    return text
+
+
+def _insert(entries: list, entry: tuple[int, int]) -> None:
+    # Schedules mostly arrive in departure order, so appending is the common case.
+    if not entries or entries[-1] <= entry:
+        entries.append(entry)
+    else:
+        insort(entries, entry)
+
+
+def _merge(entries: list, new: list) -> None:
+    if len(new) <= MERGE_MIN:
+        # Shifting the list a few times is cheaper than merging all of it.
+        for entry in new:
+            _insert(entries, entry)
+        return
+    new.sort()
+    position = bisect_left(entries, new[0])
+    if position == len(entries):
+        entries += new
+    else:
+        # Timsort finds the two sorted runs and merges them in linear time.
+        tail = entries[position:]
+        tail += new
+        tail.sort()
+        entries[position:] = tail
+
+
+class Airport:
+    __slots__ = ("code", "name", "city", "country", "timezone")
+
+    def __init__(self, code: str, name: str, city: str, country: str, timezone: str = "UTC"):
+        self.code = code
+        self.name = name
+        self.city = city
+        self.country = country
+        self.timezone = timezone
+
+
+class Flight:
+    __slots__ = (
+        "id", "airline", "number", "origin", "destination",
+        "departs_at", "arrives_at", "status", "gate", "delay",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        airline: str,
+        number: int,
+        origin: str,
+        destination: str,
+        departs_at: int,
+        arrives_at: int,
+        status: str = "scheduled",
+        gate: str | None = None,
+        delay: int = 0,
+    ):
+        self.id = id
+        self.airline = airline
+        self.number = number
+        self.origin = origin
+        self.destination = destination
+        self.departs_at = departs_at
+        self.arrives_at = arrives_at
+        self.status = status
+        self.gate = gate
+        self.delay = delay
+
+
+class Booking:
+    __slots__ = ("id", "flight_id", "passenger", "seat", "booked_at")
+
+    def __init__(self, id: int, flight_id: int, passenger: str, seat: str | None, booked_at: int):
+        self.id = id
+        self.flight_id = flight_id
+        self.passenger = passenger
+        self.seat = seat
+        self.booked_at = booked_at
+
+
+class FlightStore:
+    """In-process flight/airport store with precomputed secondary indexes.
+
+    Flight ids are positions in ``flights``; the route and airline indexes
+    hold ids ordered by departure time, so lookups never scan the table.
+    Routes are keyed by the UTC date of departure, whatever the origin's
+    ``timezone``.
+    Bulk loads add flights with ``deferred=True`` and then merge them into
+    the airline index with :meth:`index_deferred`, so out-of-order rows cost
+    a merge per airline instead of shifting a long list once per row. Route
+    lists cover one day and stay short, so they are always updated in place.
+    """
+
+    def __init__(self):
+        self.airports: dict[str, Airport] = {}
+        self.flights: list[Flight] = []
+        self.bookings: list[Booking] = []
+        self._by_route: dict[tuple[str, str, str], list[tuple[int, int]]] = {}
+        self._by_airline: dict[str, list[tuple[int, int]]] = {}
+        self._deferred: dict[str, list[tuple[int, int]]] = {}
+
+    def add_airport(self, airport: Airport) -> Airport:
+        self.airports[airport.code] = airport
+        return airport
+
+    def get_airport(self, code: str) -> Airport | None:
+        return self.airports.get(code)
+
+    def get_airports(self, codes: list[str]) -> dict[str, Airport]:
+        airports = self.airports
+        return {code: airports[code] for code in codes if code in airports}
+
+    def add_flight(
+        self,
+        airline: str,
+        number: int,
+        origin: str,
+        destination: str,
+        departs_at: int,
+        arrives_at: int,
+        status: str = "scheduled",
+        gate: str | None = None,
+        deferred: bool = False,
+    ) -> Flight:
+        flight = Flight(
+            len(self.flights), airline, number, origin, destination,
+            departs_at, arrives_at, status, gate,
+        )
+        self.flights.append(flight)
+        entry = (departs_at, flight.id)
+        _insert(self._by_route.setdefault((origin, destination, day_of(departs_at)), []), entry)
+        if deferred:
+            self._deferred.setdefault(airline, []).append(entry)
+        else:
+            _insert(self._by_airline.setdefault(airline, []), entry)
+        return flight
+
+    def index_deferred(self) -> Iterator[None]:
+        """Merge flights added with ``deferred=True`` into the airline index.
+
+        Yields after each airline so a caller on the event loop can let other
+        work run between merges. Until then :meth:`airline_flights` and
+        :meth:`has_flight` do not see those flights.
+        """
+        deferred, self._deferred = self._deferred, {}
+        for airline, new in deferred.items():
+            _merge(self._by_airline.setdefault(airline, []), new)
+            yield
+
+    def get_flight(self, flight_id: int) -> Flight | None:
+        if 0 <= flight_id < len(self.flights):
+            return self.flights[flight_id]
+        return None
+
+    def get_flights(self, flight_ids: list[int]) -> dict[int, Flight]:
+        flights = self.flights
+        return {i: flights[i] for i in flight_ids if 0 <= i < len(flights)}
+
+    def has_flight(self, airline: str, number: int, departs_at: int) -> bool:
+        entries = self._by_airline.get(airline, ())
+        flights = self.flights
+        position = bisect_left(entries, (departs_at, -1))
+        while position < len(entries) and entries[position][0] == departs_at:
+            if flights[entries[position][1]].number == number:
+                return True
+            position += 1
+        return False
+
+    def find_flights(self, origin: str, destination: str, date: str) -> list[Flight]:
+        flights = self.flights
+        return [flights[i] for _, i in self._by_route.get((origin, destination, date), ())]
+
+    def airline_flights(self, airline: str, since: int = 0, limit: int = 100) -> list[Flight]:
+        entries = self._by_airline.get(airline, [])
+        start = bisect_left(entries, (since, -1))
+        flights = self.flights
+        return [flights[i] for _, i in entries[start:start + limit]]
+
+    def add_booking(self, flight_id: int, passenger: str, seat: str | None, booked_at: int) -> Booking:
+        booking = Booking(len(self.bookings), flight_id, passenger, seat, booked_at)
+        self.bookings.append(booking)
+        return booking